@@ -5,6 +5,7 @@ Generates multiple shapes (cube, cone, icosphere, noisy stone) with parameter co
 """
 
 import argparse
+import functools
 import os
 import json
 import numpy as np
@@ -12,72 +13,187 @@ import trimesh
 from pathlib import Path
 from datetime import datetime
 
+from src.postprocess import PostProcessor
+from src.render import render_png
+from src.utils import ensure_dir
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+def _freeze_arrays(mesh):
+    """Return read-only copies of a mesh's (vertices, faces) for caching."""
+    vertices = np.array(mesh.vertices)
+    faces = np.array(mesh.faces)
+    vertices.flags.writeable = False
+    faces.flags.writeable = False
+    return vertices, faces
+
+def _from_arrays(vertices, faces):
+    """Build a mutable Trimesh from cached arrays without re-running processing."""
+    return trimesh.Trimesh(vertices=vertices.copy(), faces=faces.copy(), process=False)
+
+# Primitive caches are keyed by parameters rounded to 6 decimals to absorb float noise
+@functools.lru_cache(maxsize=64)
+def _cube_arrays(size):
+    return _freeze_arrays(trimesh.creation.box(extents=[size, size, size]))
+
+@functools.lru_cache(maxsize=64)
+def _cone_arrays(radius, height, sections):
+    return _freeze_arrays(trimesh.creation.cone(radius=radius, height=height, sections=sections))
+
+@functools.lru_cache(maxsize=64)
+def _torus_arrays(major_radius, minor_radius, sections):
+    return _freeze_arrays(trimesh.creation.torus(major_radius=major_radius, minor_radius=minor_radius,
+                                                 major_sections=sections))
+
+@functools.lru_cache(maxsize=8)
+def _icosphere_arrays(subdivisions):
+    """Return read-only unit icosphere (vertices, faces), subdivided once per level."""
+    return _freeze_arrays(trimesh.creation.icosphere(radius=1.0, subdivisions=subdivisions))
+
 def generate_cube(size=1.0, subdivisions=0):
     """Generate a cube with optional subdivisions."""
-    return trimesh.creation.box(extents=[size, size, size])
+    return _from_arrays(*_cube_arrays(round(size, 6)))
 
 def generate_cone(radius=1.0, height=2.0, subdivisions=8):
     """Generate a cone with specified radius, height, and subdivisions."""
-    return trimesh.creation.cone(radius=radius, height=height, sections=subdivisions)
+    return _from_arrays(*_cone_arrays(round(radius, 6), round(height, 6), subdivisions))
 
 def generate_icosphere(radius=1.0, subdivisions=2):
     """Generate an icosphere with specified radius and subdivisions."""
-    return trimesh.creation.icosphere(radius=radius, subdivisions=subdivisions)
+    vertices, faces = _icosphere_arrays(subdivisions)
+    return trimesh.Trimesh(vertices=vertices * radius, faces=faces.copy(), process=False)
 
-def generate_noisy_stone(radius=1.0, noise_scale=0.1, subdivisions=2, seed=None):
-    """Generate a stone-like object with noise applied."""
-    if seed is not None:
-        np.random.seed(seed)
+def _vertex_normals(vertices, faces):
+    """Compute area-weighted unit vertex normals in a single vectorized pass."""
+    v0 = vertices[faces[:, 0]]
+    face_normals = np.cross(vertices[faces[:, 1]] - v0, vertices[faces[:, 2]] - v0)
+    
+    normals = np.zeros_like(vertices)
+    for corner in range(3):
+        np.add.at(normals, faces[:, corner], face_normals)
     
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals /= np.clip(lengths, 1e-12, None)
+    return normals
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _noisy_sphere_kernel(vertices, faces, noise, noise_scale):
+        """Displace vertices by scaled noise and return their unit normals in one fused pass."""
+        for i in prange(vertices.shape[0]):
+            for k in range(3):
+                vertices[i, k] += noise[i, k] * noise_scale
+        
+        # Scatter is kept serial so corner accumulation never races between threads
+        normals = np.zeros_like(vertices)
+        for f in range(faces.shape[0]):
+            a, b, c = faces[f, 0], faces[f, 1], faces[f, 2]
+            e1x = vertices[b, 0] - vertices[a, 0]
+            e1y = vertices[b, 1] - vertices[a, 1]
+            e1z = vertices[b, 2] - vertices[a, 2]
+            e2x = vertices[c, 0] - vertices[a, 0]
+            e2y = vertices[c, 1] - vertices[a, 1]
+            e2z = vertices[c, 2] - vertices[a, 2]
+            nx = e1y * e2z - e1z * e2y
+            ny = e1z * e2x - e1x * e2z
+            nz = e1x * e2y - e1y * e2x
+            for v in (a, b, c):
+                normals[v, 0] += nx
+                normals[v, 1] += ny
+                normals[v, 2] += nz
+        
+        for i in prange(normals.shape[0]):
+            length = np.sqrt(normals[i, 0] ** 2 + normals[i, 1] ** 2 + normals[i, 2] ** 2)
+            if length < 1e-12:
+                length = 1e-12
+            for k in range(3):
+                normals[i, k] /= length
+        return normals
+else:
+    _noisy_sphere_kernel = None
+
+def generate_noisy_stone(radius=1.0, noise_scale=0.1, subdivisions=2, seed=None, rng=None):
+    """Generate a stone-like object with noise applied (rng defaults to a PCG64 Generator from seed)."""
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
     # Start with an icosphere
-    mesh = trimesh.creation.icosphere(radius=radius, subdivisions=subdivisions)
+    mesh = generate_icosphere(radius=radius, subdivisions=subdivisions)
+
+    # Noise is always drawn from the seeded Generator so both paths produce the same stone
+    noise = rng.standard_normal(mesh.vertices.shape, dtype=mesh.vertices.dtype)
     
-    # Add noise to vertices for stone-like appearance
-    noise = np.random.normal(0, noise_scale, mesh.vertices.shape)
+    if _noisy_sphere_kernel is not None:
+        vertices = np.array(mesh.vertices)
+        normals = _noisy_sphere_kernel(vertices, np.ascontiguousarray(mesh.faces), noise, noise_scale)
+        mesh.vertices = vertices
+        mesh.vertex_normals = normals
+        return mesh
+    
+    # Add noise to vertices for stone-like appearance (scaled in place, no extra temporaries)
+    noise *= noise_scale
     mesh.vertices += noise
     
     # Recompute normals after noise
-    mesh.compute_vertex_normals()
+    mesh.vertex_normals = _vertex_normals(mesh.vertices, mesh.faces)
     
     return mesh
 
 def generate_torus(major_radius=1.0, minor_radius=0.3, subdivisions=8):
-    """Generate a torus with specified radii and subdivisions."""
-    return trimesh.creation.torus(major_radius=major_radius, minor_radius=minor_radius, sections=subdivisions)
+    """Generate a torus with specified radii and subdivisions (at least 8 sections around the ring)."""
+    # The CLI's default subdivision level (2) would otherwise give a flat, two-section ring
+    sections = max(subdivisions, 8)
+    return _from_arrays(*_torus_arrays(round(major_radius, 6), round(minor_radius, 6), sections))
+
+def _write_obj(mesh, obj_path):
+    """Write positions, normals and faces as OBJ with bulk np.savetxt calls."""
+    faces = np.asarray(mesh.faces) + 1
+    with open(obj_path, 'wb') as f:
+        np.savetxt(f, mesh.vertices, fmt='v %.8f %.8f %.8f')
+        np.savetxt(f, mesh.vertex_normals, fmt='vn %.8f %.8f %.8f')
+        np.savetxt(f, np.repeat(faces, 2, axis=1), fmt='f %d//%d %d//%d %d//%d')
 
-def save_asset(mesh, name, output_dir="outputs/assets", save_obj=True, save_glb=True, save_screenshot=True):
-    """Save mesh in multiple formats."""
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+def save_asset(mesh, name, output_dir="outputs/assets", save_obj=False, save_glb=True, save_screenshot=True,
+               quantize=False, include_normals=False):
+    """Save mesh in multiple formats (GLB only by default; quantize writes int16 KHR_mesh_quantization positions)."""
+    output_path = ensure_dir(output_dir)
     
     saved_files = {}
     
     # Save GLB
     if save_glb:
         glb_path = output_path / f"{name}.glb"
-        mesh.export(str(glb_path))
+        if quantize:
+            glb_bytes = PostProcessor().export_quantized_glb(mesh)
+        elif mesh.visual.kind is None:
+            # Plain geometry: float32 positions and uint16 indices where they fit
+            glb_bytes = PostProcessor().export_compact_glb(mesh, include_normals=include_normals)
+        else:
+            glb_bytes = mesh.export(file_type='glb')
+        glb_path.write_bytes(glb_bytes)
         saved_files['glb'] = str(glb_path)
         print(f"✅ Saved GLB: {glb_path}")
     
     # Save OBJ
     if save_obj:
         obj_path = output_path / f"{name}.obj"
-        mesh.export(str(obj_path))
+        _write_obj(mesh, obj_path)
         saved_files['obj'] = str(obj_path)
         print(f"✅ Saved OBJ: {obj_path}")
     
     # Save screenshot
     if save_screenshot:
-        screenshot_path = Path("outputs/screenshots")
-        screenshot_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create a simple scene for screenshot
-        scene = trimesh.Scene([mesh])
+        screenshot_path = ensure_dir("outputs/screenshots")
         screenshot_file = screenshot_path / f"{name}_screenshot.png"
         
         try:
-            # Try to save screenshot (may not work in headless environments)
-            scene.save_image(str(screenshot_file), resolution=(512, 512))
+            if not render_png(mesh, screenshot_file):
+                # Fall back to trimesh's viewer (may not work in headless environments)
+                png = trimesh.Scene([mesh]).save_image(resolution=(512, 512))
+                screenshot_file.write_bytes(png)
             saved_files['screenshot'] = str(screenshot_file)
             print(f"✅ Saved screenshot: {screenshot_file}")
         except Exception as e:
@@ -85,27 +201,59 @@ def save_asset(mesh, name, output_dir="outputs/assets", save_obj=True, save_glb=
     
     return saved_files
 
-def get_mesh_info(mesh):
-    """Get basic information about the mesh."""
-    return {
-        'vertices': len(mesh.vertices),
-        'faces': len(mesh.faces),
-        'edges': len(mesh.edges),
-        'is_watertight': mesh.is_watertight,
-        'volume': float(mesh.volume) if hasattr(mesh, 'volume') else 0.0,
-        'surface_area': float(mesh.surface_area) if hasattr(mesh, 'surface_area') else 0.0,
+# Shape name -> builder taking the parsed CLI args; swap an entry to change a shape's implementation
+SHAPE_BUILDERS = {
+    'cube': lambda a: generate_cube(size=a.size, subdivisions=a.subdivisions),
+    'cone': lambda a: generate_cone(radius=a.radius, height=a.height, subdivisions=a.subdivisions),
+    'icosphere': lambda a: generate_icosphere(radius=a.radius, subdivisions=a.subdivisions),
+    'stone': lambda a: generate_noisy_stone(radius=a.radius, noise_scale=a.noise_scale,
+                                            subdivisions=a.subdivisions, seed=a.seed),
+    'torus': lambda a: generate_torus(major_radius=a.radius, minor_radius=a.minor_radius,
+                                      subdivisions=a.subdivisions),
+}
+
+# Shapes whose topology is closed by construction; noise only moves stone vertices
+_CLOSED_SHAPES = frozenset({'cube', 'icosphere', 'stone'})
+
+# Shapes whose builders compute vertex normals that the compact GLB should carry
+_SHAPES_WITH_NORMALS = frozenset({'stone'})
+
+def get_mesh_info(mesh, include_topology=False, shape_name=None, include_normals=False):
+    """Get basic information about the mesh (watertightness only with include_topology; include_normals as saved)."""
+    vertices = np.asarray(mesh.vertices)
+    faces = np.asarray(mesh.faces)
+    
+    # Area, volume and bounds straight from the arrays, one cross product per face
+    v0 = vertices[faces[:, 0]]
+    cross = np.cross(vertices[faces[:, 1]] - v0, vertices[faces[:, 2]] - v0)
+    bounds_min = vertices.min(axis=0)
+    bounds_max = vertices.max(axis=0)
+    
+    info = {
+        'vertices': len(vertices),
+        'faces': len(faces),
+        # trimesh's mesh.edges holds every face's three directed edges; count them without building it
+        'edges': 3 * len(faces),
+        'volume': float(np.einsum('ij,ij->', v0, cross) / 6.0),
+        'surface_area': float(0.5 * np.linalg.norm(cross, axis=1).sum()),
         'bounding_box': {
-            'min': mesh.bounds[0].tolist(),
-            'max': mesh.bounds[1].tolist(),
-            'size': (mesh.bounds[1] - mesh.bounds[0]).tolist()
+            'min': bounds_min.tolist(),
+            'max': bounds_max.tolist(),
+            'size': (bounds_max - bounds_min).tolist()
         },
-        'has_vertex_normals': hasattr(mesh, 'vertex_normals') and mesh.vertex_normals is not None,
-        'has_face_normals': hasattr(mesh, 'face_normals') and mesh.face_normals is not None
+        # Vertex normals are reported as exported; face normals always follow from the faces
+        'has_vertex_normals': include_normals,
+        'has_face_normals': len(faces) > 0
     }
+    
+    if include_topology:
+        info['is_watertight'] = True if shape_name in _CLOSED_SHAPES else mesh.is_watertight
+    
+    return info
 
 def main():
     parser = argparse.ArgumentParser(description='Generate 3D assets for games')
-    parser.add_argument('--shape', choices=['cube', 'cone', 'icosphere', 'stone', 'torus'], 
+    parser.add_argument('--shape', choices=list(SHAPE_BUILDERS), 
                        default='cube', help='Shape to generate')
     parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible generation')
     parser.add_argument('--radius', type=float, default=1.0, help='Radius parameter')
@@ -116,28 +264,17 @@ def main():
     parser.add_argument('--minor-radius', type=float, default=0.3, help='Minor radius (for torus)')
     parser.add_argument('--output-dir', default='outputs/assets', help='Output directory')
     parser.add_argument('--name', help='Custom name for the asset (default: shape_timestamp)')
+    parser.add_argument('--save-obj', action='store_true', help='Also export an OBJ next to the GLB')
+    parser.add_argument('--quantize', action='store_true',
+                       help='Quantize GLB positions to int16 (KHR_mesh_quantization)')
     
     args = parser.parse_args()
     
-    # Set random seed
-    np.random.seed(args.seed)
-    
     print(f"🎨 Generating {args.shape} asset...")
     print(f"📊 Parameters: seed={args.seed}, radius={args.radius}, subdivisions={args.subdivisions}")
     
     # Generate mesh based on shape
-    if args.shape == 'cube':
-        mesh = generate_cube(size=args.size, subdivisions=args.subdivisions)
-    elif args.shape == 'cone':
-        mesh = generate_cone(radius=args.radius, height=args.height, subdivisions=args.subdivisions)
-    elif args.shape == 'icosphere':
-        mesh = generate_icosphere(radius=args.radius, subdivisions=args.subdivisions)
-    elif args.shape == 'stone':
-        mesh = generate_noisy_stone(radius=args.radius, noise_scale=args.noise_scale, 
-                                  subdivisions=args.subdivisions, seed=args.seed)
-    elif args.shape == 'torus':
-        mesh = generate_torus(major_radius=args.radius, minor_radius=args.minor_radius, 
-                            subdivisions=args.subdivisions)
+    mesh = SHAPE_BUILDERS[args.shape](args)
     
     # Generate name if not provided
     if not args.name:
@@ -145,15 +282,18 @@ def main():
         args.name = f"{args.shape}_{timestamp}"
     
     # Save asset
-    saved_files = save_asset(mesh, args.name, args.output_dir)
+    include_normals = args.shape in _SHAPES_WITH_NORMALS
+    saved_files = save_asset(mesh, args.name, args.output_dir, save_obj=args.save_obj, quantize=args.quantize,
+                             include_normals=include_normals)
     
     # Get mesh information
-    mesh_info = get_mesh_info(mesh)
+    mesh_info = get_mesh_info(mesh, include_topology=True, shape_name=args.shape,
+                              include_normals=include_normals)
     mesh_info['parameters'] = vars(args)
     mesh_info['saved_files'] = saved_files
     
     # Save metadata
-    metadata_path = Path(args.output_dir) / f"{args.name}_metadata.json"
+    metadata_path = ensure_dir(args.output_dir) / f"{args.name}_metadata.json"
     with open(metadata_path, 'w') as f:
         json.dump(mesh_info, f, indent=2)
     
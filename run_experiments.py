@@ -5,23 +5,89 @@ Script to run controlled experiments varying parameters.
 import os
 import json
 import itertools
-from typing import List, Dict, Any
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from src.generate import generate_asset_sync
 from src.metrics import compute_metrics, compare_meshes
 
 
+def _dumps(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, option=option)
+    text = json.dumps(obj, indent=2 if indent else None)
+    return (text + "\n" if newline else text).encode("utf-8")
+
+
+def _run_one(
+    experiment_id: int,
+    seed: int,
+    steps_val: int,
+    guidance_scale: float,
+    output_dir: str,
+    base_prompt: str
+) -> Dict[str, Any]:
+    """Run a single experiment; top-level so it can be dispatched to a worker process."""
+    parameters = {
+        "seed": seed,
+        "steps": steps_val,
+        "guidance_scale": guidance_scale
+    }
+    
+    try:
+        result = generate_asset_sync(
+            prompt=base_prompt,
+            seed=seed,
+            steps=steps_val,
+            guidance_scale=guidance_scale,
+            output_dir=output_dir
+        )
+        
+        return {
+            "experiment_id": experiment_id,
+            "parameters": parameters,
+            "result": result,
+            "timestamp": time.time()
+        }
+    
+    except Exception as e:
+        print(f"Experiment {experiment_id} failed: {e}")
+        return {
+            "experiment_id": experiment_id,
+            "parameters": parameters,
+            "error": str(e),
+            "timestamp": time.time()
+        }
+
+
 def run_parameter_experiments(
     output_dir: str = "outputs/experiments",
-    base_prompt: str = "test shape"
+    base_prompt: str = "test shape",
+    max_workers: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Run experiments varying different parameters.
     
+    Experiments are independent and seeded, so they run in parallel across
+    processes; results are reordered by experiment id before comparison.
+    
     Args:
         output_dir: Output directory for experiments
         base_prompt: Base prompt for generation
+        max_workers: Worker process count (defaults to the CPU count)
     
     Returns:
         Dictionary with experiment results
@@ -39,78 +105,57 @@ def run_parameter_experiments(
     print(f"Running {len(parameter_combinations)} experiments...")
     
     results = []
-    base_metrics = None
     
-    for i, (seed, steps_val, guidance_scale) in enumerate(parameter_combinations):
-        print(f"Experiment {i+1}/{len(parameter_combinations)}: seed={seed}, steps={steps_val}, guidance={guidance_scale}")
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_run_one, i + 1, seed, steps_val, guidance_scale, output_dir, base_prompt)
+            for i, (seed, steps_val, guidance_scale) in enumerate(parameter_combinations)
+        ]
         
-        try:
-            # Generate asset
-            result = generate_asset_sync(
-                prompt=base_prompt,
-                seed=seed,
-                steps=steps_val,
-                guidance_scale=guidance_scale,
-                output_dir=output_dir
-            )
-            
-            # Store base metrics for comparison
-            if base_metrics is None:
-                base_metrics = result["metrics"]
-            
-            # Compare with base
-            comparison = compare_meshes(base_metrics, result["metrics"])
-            
-            experiment_result = {
-                "experiment_id": i + 1,
-                "parameters": {
-                    "seed": seed,
-                    "steps": steps_val,
-                    "guidance_scale": guidance_scale
-                },
-                "result": result,
-                "comparison": comparison,
-                "timestamp": time.time()
-            }
-            
+        for future in as_completed(futures):
+            experiment_result = future.result()
+            params = experiment_result["parameters"]
+            print(f"Experiment {experiment_result['experiment_id']}/{len(parameter_combinations)} done: "
+                  f"seed={params['seed']}, steps={params['steps']}, guidance={params['guidance_scale']}")
             results.append(experiment_result)
-            
-            # Save individual experiment
-            exp_file = os.path.join(output_dir, f"experiment_{i+1:03d}.json")
-            with open(exp_file, 'w') as f:
-                json.dump(experiment_result, f, indent=2)
-            
-        except Exception as e:
-            print(f"Experiment {i+1} failed: {e}")
-            results.append({
-                "experiment_id": i + 1,
-                "parameters": {
-                    "seed": seed,
-                    "steps": steps_val,
-                    "guidance_scale": guidance_scale
-                },
-                "error": str(e),
-                "timestamp": time.time()
-            })
-    
-    # Save summary
+    
+    results.sort(key=lambda r: r["experiment_id"])
+    
+    # Compare every successful experiment against the first successful one and
+    # accumulate the JSON Lines records in one buffer that is flushed with a single write
+    base_metrics = None
+    successful = 0
+    records = bytearray()
+    for experiment_result in results:
+        if "error" not in experiment_result:
+            if base_metrics is None:
+                base_metrics = experiment_result["result"]["metrics"]
+            experiment_result["comparison"] = compare_meshes(base_metrics, experiment_result["result"]["metrics"])
+            successful += 1
+        
+        records += _dumps(experiment_result, newline=True)
+    
+    Path(output_dir, "experiments.jsonl").write_bytes(records)
+    
+    # Save summary (per-experiment records live in experiments.jsonl)
     summary = {
         "total_experiments": len(parameter_combinations),
-        "successful_experiments": len([r for r in results if "error" not in r]),
-        "failed_experiments": len([r for r in results if "error" in r]),
+        "successful_experiments": successful,
+        "failed_experiments": len(results) - successful,
         "parameter_ranges": {
             "seeds": seeds,
             "steps": steps,
             "guidance_scales": guidance_scales
         },
-        "results": results,
+        "results_file": "experiments.jsonl",
         "timestamp": time.time()
     }
     
     summary_file = os.path.join(output_dir, "experiments_summary.json")
-    with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2)
+    Path(summary_file).write_bytes(_dumps(summary, indent=True))
     
+    # Keep the records on the returned summary for analyze_experiments
+    summary["results"] = results
     return summary
 
 
@@ -175,47 +220,44 @@ def analyze_experiments(summary: Dict[str, Any]) -> Dict[str, Any]:
     return analysis
 
 
+_EFFECT_FIELDS = (
+    ("vertex_count", "vertex_count", int),
+    ("face_count", "face_count", int),
+    ("volume", "volume", float),
+    ("file_size", "file_size_bytes", int),
+)
+
+
 def analyze_parameter_effect(parameter_groups: Dict, param_name: str) -> Dict[str, Any]:
     """Analyze the effect of a single parameter."""
     import numpy as np
     
     effects = {}
+    metric_keys = [key for _, key, _ in _EFFECT_FIELDS]
     
     for param_value, metrics_list in parameter_groups.items():
         if not metrics_list:
             continue
         
-        # Calculate statistics for this parameter value
-        vertex_counts = [m["vertex_count"] for m in metrics_list]
-        face_counts = [m["face_count"] for m in metrics_list]
-        volumes = [m["volume"] for m in metrics_list]
-        file_sizes = [m["file_size_bytes"] for m in metrics_list]
+        # Stack the group into one (N, fields) array and reduce column-wise
+        values = np.fromiter(
+            (m[key] for m in metrics_list for key in metric_keys),
+            dtype=np.float64,
+            count=len(metrics_list) * len(metric_keys)
+        ).reshape(-1, len(metric_keys))
+        means = values.mean(axis=0)
+        stds = values.std(axis=0)
+        mins = values.min(axis=0)
+        maxs = values.max(axis=0)
         
         effects[param_value] = {
-            "vertex_count": {
-                "mean": float(np.mean(vertex_counts)),
-                "std": float(np.std(vertex_counts)),
-                "min": int(np.min(vertex_counts)),
-                "max": int(np.max(vertex_counts))
-            },
-            "face_count": {
-                "mean": float(np.mean(face_counts)),
-                "std": float(np.std(face_counts)),
-                "min": int(np.min(face_counts)),
-                "max": int(np.max(face_counts))
-            },
-            "volume": {
-                "mean": float(np.mean(volumes)),
-                "std": float(np.std(volumes)),
-                "min": float(np.min(volumes)),
-                "max": float(np.max(volumes))
-            },
-            "file_size": {
-                "mean": float(np.mean(file_sizes)),
-                "std": float(np.std(file_sizes)),
-                "min": int(np.min(file_sizes)),
-                "max": int(np.max(file_sizes))
+            name: {
+                "mean": float(means[col]),
+                "std": float(stds[col]),
+                "min": cast(mins[col]),
+                "max": cast(maxs[col])
             }
+            for col, (name, _, cast) in enumerate(_EFFECT_FIELDS)
         }
     
     return effects
@@ -225,13 +267,24 @@ def analyze_quality_metrics(all_metrics: List[Dict[str, Any]]) -> Dict[str, Any]
     """Analyze quality metrics across all experiments."""
     import numpy as np
     
+    flags = np.array(
+        [(m["loadable"], m["is_watertight"], m["has_uv_coordinates"]) for m in all_metrics],
+        dtype=np.bool_
+    )
+    counts = np.array(
+        [(m["vertex_count"], m["face_count"], m["file_size_mb"]) for m in all_metrics],
+        dtype=np.float64
+    )
+    flag_rates = flags.mean(axis=0)
+    count_means = counts.mean(axis=0)
+    
     quality = {
-        "loadability_rate": sum(1 for m in all_metrics if m["loadable"]) / len(all_metrics),
-        "watertight_rate": sum(1 for m in all_metrics if m["is_watertight"]) / len(all_metrics),
-        "uv_coverage_rate": sum(1 for m in all_metrics if m["has_uv_coordinates"]) / len(all_metrics),
-        "average_vertex_count": float(np.mean([m["vertex_count"] for m in all_metrics])),
-        "average_face_count": float(np.mean([m["face_count"] for m in all_metrics])),
-        "average_file_size_mb": float(np.mean([m["file_size_mb"] for m in all_metrics]))
+        "loadability_rate": float(flag_rates[0]),
+        "watertight_rate": float(flag_rates[1]),
+        "uv_coverage_rate": float(flag_rates[2]),
+        "average_vertex_count": float(count_means[0]),
+        "average_face_count": float(count_means[1]),
+        "average_file_size_mb": float(count_means[2])
     }
     
     return quality
@@ -271,8 +324,7 @@ if __name__ == "__main__":
     
     # Save analysis
     analysis_file = "outputs/experiments/analysis.json"
-    with open(analysis_file, 'w') as f:
-        json.dump(analysis, f, indent=2)
+    Path(analysis_file).write_bytes(_dumps(analysis, indent=True))
     
     print("Analysis saved to outputs/experiments/analysis.json")
     print("Recommendations:")
@@ -0,0 +1,12 @@
+"""
+Shared import setup for the scripts in this directory.
+Puts the project root on sys.path exactly once, however many scripts import it.
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
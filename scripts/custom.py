@@ -10,12 +10,21 @@ import json
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
 # Import the generator
 from src.generate import generate_asset_sync
 
+try:
+    from validate_output import validate_output as _validate_func
+    from visualize_output import visualize_output
+except ImportError:
+    from scripts.validate_output import validate_output as _validate_func
+    from scripts.visualize_output import visualize_output
+
 def main():
     """Run custom generation test with your prompts."""
     print(" Custom 3D Asset Generation Test")
@@ -73,16 +82,16 @@ def main():
             print(f"   Volume: {validation_result['volume']:.3f}")
             print(f"   File size: {validation_result['metadata']['metrics']['file_size_mb']:.3f} MB")
             print()
+            job_dir = Path(validation_result['glb_path']).parent
             print(" Generated Files:")
             print(f"   GLB: {validation_result['glb_path']}")
-            print(f"   Screenshot: {Path(validation_result['glb_path']).parent / 'screenshot.png'}")
-            print(f"   Metadata: {Path(validation_result['glb_path']).parent / 'metadata.json'}")
+            print(f"   Screenshot: {job_dir / 'screenshot.png'}")
+            print(f"   Metadata: {job_dir / 'metadata.json'}")
             print()
             
             # Run visualization
             print("🎨 Running visualization...")
             try:
-                from visualize_output import visualize_output
                 visualization_result = visualize_output(output_dir)
                 if visualization_result:
                     print("✅ Visualization completed")
@@ -106,9 +115,7 @@ def main():
 def validate_output(output_dir):
     """Validate the generated output using the validation script."""
     try:
-        # Import and run the validation function
-        from validate_output import validate_output as validate_func
-        return validate_func(output_dir)
+        return _validate_func(output_dir)
     except Exception as e:
         return {'success': False, 'error': f"Validation error: {str(e)}"}
 
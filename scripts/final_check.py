@@ -11,12 +11,21 @@ import datetime
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
 # Import pipeline pieces
 from src.generate import generate_asset_sync
 
+try:
+    from validate_output import validate_output as _validate_func
+    from visualize_output import visualize_output
+except ImportError:
+    from scripts.validate_output import validate_output as _validate_func
+    from scripts.visualize_output import visualize_output
+
 
 def main():
     print("\n FINAL END-TO-END PIPELINE CHECK")
@@ -82,7 +91,6 @@ def main():
             # Step 3: Visualization
             print("\n Launching visualization...")
             try:
-                from visualize_output import visualize_output
                 if visualize_output(output_dir):
                     print(" Visualization completed")
                 else:
@@ -107,8 +115,7 @@ def main():
 def validate_output(output_dir):
     """Wrapper for validation script."""
     try:
-        from validate_output import validate_output as validate_func
-        return validate_func(output_dir)
+        return _validate_func(output_dir)
     except Exception as e:
         return {"success": False, "error": f"Validation error: {str(e)}"}
 
@@ -4,15 +4,18 @@ End-to-End Test Harness for 3D Asset Generation Pipeline.
 Runs generation, validation, and visualization in sequence.
 """
 
+import asyncio
 import sys
 import os
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
-def main():
+async def main():
     """Run complete end-to-end test pipeline."""
     print("🚀 3D Asset Generation Pipeline - End-to-End Test")
     print("=" * 60)
@@ -24,12 +27,12 @@ def main():
     print()
     
     try:
-        # Step 1: Run generation test
+        # Step 1: Run generation test (validation and visualization both need its GLB)
         print("📋 Step 1: Generation Test")
         print("-" * 30)
         
         from test_generation import main as run_generation
-        generation_result = run_generation()
+        generation_result = await asyncio.to_thread(run_generation)
         
         if generation_result != 0:
             print("❌ Generation test failed!")
@@ -38,12 +41,19 @@ def main():
         print("\n✅ Generation successful")
         print()
         
-        # Step 2: Run validation
-        print("📋 Step 2: Validation Test")
+        # Steps 2 + 3: validation and visualization only read the generated files,
+        # so validate on a worker thread while visualizing
+        print("📋 Step 2: Validation Test / Step 3: Visualization Test")
         print("-" * 30)
         
         from validate_output import validate_output
-        validation_result = validate_output()
+        from visualize_output import visualize_output
+        validation_task = asyncio.create_task(asyncio.to_thread(validate_output))
+        await asyncio.sleep(0)  # let the task hand validation to its thread
+        
+        # Interactive viewers must stay on the main thread
+        visualization_result = visualize_output()
+        validation_result = await validation_task
         
         if not validation_result['success']:
             print("❌ Validation test failed!")
@@ -52,13 +62,6 @@ def main():
         print("\n✅ Validation successful")
         print()
         
-        # Step 3: Run visualization
-        print("📋 Step 3: Visualization Test")
-        print("-" * 30)
-        
-        from visualize_output import visualize_output
-        visualization_result = visualize_output()
-        
         if not visualization_result:
             print("❌ Visualization test failed!")
             return 1
@@ -131,11 +134,12 @@ def run_generation_and_validation(prompt, output_dir="outputs/custom_test", para
         print("✅ Custom generation successful!")
         print(f"   Job ID: {result['job_id']}")
         
-        # Validate the output
+        # Validate the output, reusing the metrics generation just recorded
         from validate_output import validate_output as validate_func
-        validation_result = validate_func(output_dir)
+        validation_result = validate_func(output_dir, fast=True)
         
         if validation_result['success']:
+            job_dir = Path(validation_result['glb_path']).parent
             return {
                 "status": "success",
                 "job_id": result['job_id'],
@@ -145,8 +149,8 @@ def run_generation_and_validation(prompt, output_dir="outputs/custom_test", para
                 "volume": validation_result['volume'],
                 "file_size_mb": validation_result['metadata']['metrics']['file_size_mb'],
                 "glb_path": validation_result['glb_path'],
-                "screenshot_path": str(Path(validation_result['glb_path']).parent / "screenshot.png"),
-                "metadata_path": str(Path(validation_result['glb_path']).parent / "metadata.json")
+                "screenshot_path": str(job_dir / "screenshot.png"),
+                "metadata_path": str(job_dir / "metadata.json")
             }
         else:
             return {
@@ -189,5 +193,5 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
         show_help()
     else:
-        exit_code = main()
+        exit_code = asyncio.run(main())
         sys.exit(exit_code)
\ No newline at end of file
@@ -10,8 +10,10 @@ import json
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
 # Import the generator
 from src.generate import generate_asset_sync
@@ -72,10 +74,11 @@ def main():
             print(f"   Volume: {validation_result['volume']:.3f}")
             print(f"   File size: {validation_result['metadata']['metrics']['file_size_mb']:.3f} MB")
             print()
+            job_dir = Path(validation_result['glb_path']).parent
             print("📋 Generated Files:")
             print(f"   GLB: {validation_result['glb_path']}")
-            print(f"   Screenshot: {Path(validation_result['glb_path']).parent / 'screenshot.png'}")
-            print(f"   Metadata: {Path(validation_result['glb_path']).parent / 'metadata.json'}")
+            print(f"   Screenshot: {job_dir / 'screenshot.png'}")
+            print(f"   Metadata: {job_dir / 'metadata.json'}")
             print()
             print("🎉 Fantasy chest test PASSED!")
             return 0
@@ -10,8 +10,10 @@ import json
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
 # Import the generator
 from src.generate import generate_asset_sync
@@ -6,42 +6,86 @@ Opens an interactive viewer and saves PNG snapshot.
 
 import sys
 import os
+import shutil
+import subprocess
 from pathlib import Path
 
 # Add project root to path for imports
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:
+    from scripts._bootstrap import project_root
 
 try:
-    import trimesh
-    import numpy as np
+    from validate_output import find_latest_glb
 except ImportError:
-    print("❌ Error: trimesh not installed. Run: pip install trimesh")
-    sys.exit(1)
+    from scripts.validate_output import find_latest_glb
+
+from src.utils import ensure_dir
+
+# Face budget for the matplotlib snapshot fallback
+SNAPSHOT_MAX_FACES = 5000
 
-def find_latest_glb(output_dir="outputs/test_run"):
-    """Find the latest GLB file in the output directory structure."""
-    output_path = Path(output_dir)
-    if not output_path.exists():
-        raise FileNotFoundError(f"Output directory not found: {output_dir}")
+def optimize_png(path):
+    """Recompress a PNG in place with Pillow, then pngquant if installed, keeping the smallest."""
+    from PIL import Image
     
-    # Look for GLB files in subdirectories (job_id folders)
-    glb_files = []
-    for subdir in output_path.iterdir():
-        if subdir.is_dir():
-            main_glb = subdir / "main.glb"
-            if main_glb.exists():
-                glb_files.append(main_glb)
+    with Image.open(path) as img:
+        img.load()
+    img.save(path, format="PNG", optimize=True, compress_level=9)
     
-    if not glb_files:
-        raise FileNotFoundError(f"No GLB files found in {output_dir}")
+    # Lossy palette quantization only replaces the file when it actually shrinks it
+    pngquant = shutil.which("pngquant")
+    if pngquant:
+        quantized = f"{path}.quant.png"
+        try:
+            result = subprocess.run([pngquant, "--skip-if-larger", "--quality=70-95",
+                                     "--output", quantized, "--", str(path)],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode == 0 and os.path.getsize(quantized) < os.path.getsize(path):
+                os.replace(quantized, path)
+        finally:
+            if os.path.exists(quantized):
+                os.remove(quantized)
+
+def save_offscreen_snapshot(mesh, output_path, resolution=1024):
+    """Render a PNG snapshot with the shared offscreen renderer; returns False if unavailable."""
+    try:
+        from src.render import render_png
+    except ImportError:
+        return False
     
-    # Return the most recently modified
-    return max(glb_files, key=lambda p: p.stat().st_mtime)
+    try:
+        if len(mesh.vertices) == 0:
+            raise ValueError("Mesh has no vertices to render")
+        
+        print("📸 Rendering PNG snapshot offscreen...")
+        if not render_png(mesh, output_path, (resolution, resolution)):
+            return False
+        
+        print(f"✅ PNG snapshot saved: {output_path}")
+        return True
+        
+    except Exception as e:
+        print(f"⚠️  Offscreen snapshot failed ({e}), falling back to matplotlib")
+        return False
 
-def save_png_snapshot(mesh, output_path):
-    """Save a PNG snapshot of the mesh or scene."""
+def _preview_mesh(mesh, max_faces=SNAPSHOT_MAX_FACES):
+    """Decimate a mesh to at most max_faces for the matplotlib preview."""
+    faces = getattr(mesh, "faces", None)
+    if faces is None or len(faces) <= max_faces:
+        return mesh
+    
+    from src.postprocess import PostProcessor
+    return PostProcessor().decimate_mesh(mesh, max_faces)
+
+def save_png_snapshot(mesh, output_path, dpi=150):
+    """Save a PNG snapshot of the mesh or scene (offscreen pyrender, else matplotlib)."""
+    if save_offscreen_snapshot(mesh, output_path):
+        return True
+    
     try:
+        import numpy as np
         import matplotlib.pyplot as plt
         from mpl_toolkits.mplot3d import Axes3D
 
@@ -50,6 +94,9 @@ def save_png_snapshot(mesh, output_path):
 
         print("📸 Creating PNG snapshot...")
 
+        # plot_trisurf projects every polygon, so draw a decimated preview
+        mesh = _preview_mesh(mesh)
+
         fig = plt.figure(figsize=(12, 10))
         ax = fig.add_subplot(111, projection="3d")
 
@@ -88,8 +135,9 @@ def save_png_snapshot(mesh, output_path):
 
         # Save
         plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches="tight")
+        plt.savefig(output_path, dpi=dpi, bbox_inches="tight")
         plt.close()
+        optimize_png(output_path)
 
         print(f"✅ PNG snapshot saved: {output_path}")
         return True
@@ -101,6 +149,7 @@ def save_png_snapshot(mesh, output_path):
 def visualize_with_pyrender(mesh):
     """Visualize mesh using pyrender (preferred option)."""
     try:
+        import numpy as np
         import pyrender
         
         print("🎮 Creating pyrender visualization...")
@@ -143,6 +192,7 @@ def visualize_with_pyrender(mesh):
 def visualize_with_matplotlib(mesh):
     """Visualize mesh using matplotlib (fallback option)."""
     try:
+        import numpy as np
         import matplotlib.pyplot as plt
         from mpl_toolkits.mplot3d import Axes3D
         
@@ -194,6 +244,13 @@ def visualize_output(output_dir="outputs/test_run"):
     print("🎨 3D Asset Visualization")
     print("=" * 40)
     
+    # Imported on first use so importing this module (e.g. from custom.py) stays cheap
+    try:
+        import trimesh
+    except ImportError:
+        print("❌ Error: trimesh not installed. Run: pip install trimesh")
+        return False
+    
     try:
         # Find the latest GLB file
         glb_path = find_latest_glb(output_dir)
@@ -201,18 +258,12 @@ def visualize_output(output_dir="outputs/test_run"):
         
         # Load mesh
         print("🔄 Loading GLB file...")
-        loaded = trimesh.load(str(glb_path))
-        
-        if isinstance(loaded, trimesh.Scene):
-            print("⚠️  Scene detected, combining geometries...")
-            if len(loaded.geometry) == 0:
-                raise ValueError("Scene has no geometry")
-            geometries = list(loaded.geometry.values())
-            mesh = trimesh.util.concatenate(geometries)
-            print(f"   Combined {len(geometries)} geometries")
-        else:
-            mesh = loaded
-            print("✅ Loaded as single mesh")
+        # Only vertices and faces are needed to view it: skip welding and
+        # material decoding, and let trimesh flatten scenes into one mesh
+        mesh = trimesh.load(str(glb_path), process=False, skip_materials=True, force='mesh')
+        if mesh.is_empty:
+            raise ValueError("GLB has no geometry")
+        print("✅ Loaded as single mesh")
         
         # Mesh info
         print(f"\n📊 Mesh Info:")
@@ -228,8 +279,7 @@ def visualize_output(output_dir="outputs/test_run"):
         save_png_snapshot(mesh, local_snapshot)
         
         # 2. Central screenshots folder
-        screenshots_dir = Path("outputs/screenshots")
-        screenshots_dir.mkdir(parents=True, exist_ok=True)
+        screenshots_dir = ensure_dir("outputs/screenshots")
         central_snapshot = screenshots_dir / f"{job_id}_snapshot.png"
         save_png_snapshot(mesh, central_snapshot)
         
@@ -7,9 +7,10 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import asyncio
-import threading
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-from .worker import job_queue, JobStatus
+from .worker import job_queue
 from .generate import generate_asset_sync
 
 
@@ -19,6 +20,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Longest a /status?wait=true request holds before returning the current status
+STATUS_WAIT_TIMEOUT = 30.0
+
 
 class GenerationRequest(BaseModel):
     prompt: str
@@ -37,14 +41,23 @@ class GenerationResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Start the background worker on startup."""
-    # Start worker in background thread
-    def run_worker():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(job_queue.start_worker())
+    loop = asyncio.get_running_loop()
+    
+    # Size the pool behind asyncio.to_thread so sync generations can run on every core
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=os.cpu_count() or 1))
     
-    worker_thread = threading.Thread(target=run_worker, daemon=True)
-    worker_thread.start()
+    # The worker only awaits and hands generation to the executor, so it can
+    # share the server's loop
+    app.state.worker_task = asyncio.create_task(job_queue.start_worker())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background worker on shutdown."""
+    job_queue.stop_worker()
+    worker_task = getattr(app.state, "worker_task", None)
+    if worker_task is not None:
+        await worker_task
 
 
 @app.get("/")
@@ -75,8 +88,10 @@ async def generate_asset(request: GenerationRequest, background_tasks: Backgroun
     """
     try:
         if request.sync:
-            # Synchronous generation for testing
-            result = generate_asset_sync(
+            # Synchronous generation for testing, on a worker thread so the
+            # event loop keeps serving other requests meanwhile
+            result = await asyncio.to_thread(
+                generate_asset_sync,
                 prompt=request.prompt,
                 seed=request.seed,
                 steps=request.steps,
@@ -108,17 +123,22 @@ async def generate_asset(request: GenerationRequest, background_tasks: Backgroun
 
 
 @app.get("/status/{job_id}")
-async def get_job_status(job_id: str):
+async def get_job_status(job_id: str, wait: bool = False):
     """
     Get the status of a generation job.
     
     Args:
         job_id: Job identifier
+        wait: Respond once the job has completed or failed (or after
+            STATUS_WAIT_TIMEOUT seconds), instead of polling
     
     Returns:
         Job status and results
     """
-    status = job_queue.get_job_status(job_id)
+    if wait:
+        status = await job_queue.wait_for_job(job_id, timeout=STATUS_WAIT_TIMEOUT)
+    else:
+        status = job_queue.get_job_status(job_id)
     
     if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -148,7 +168,8 @@ async def health_check():
 async def test_endpoint():
     """Test endpoint that generates a simple asset synchronously."""
     try:
-        result = generate_asset_sync(
+        result = await asyncio.to_thread(
+            generate_asset_sync,
             prompt="test cube",
             seed=42,
             steps=10,
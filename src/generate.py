@@ -5,16 +5,33 @@ Main generation orchestrator that creates 3D assets with metadata and screenshot
 import os
 import json
 import uuid
-from typing import Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
 import trimesh
 import numpy as np
 from PIL import Image
 import io
 
-from .model_loader import load_model
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .model_loader import load_shared_model
 from .postprocess import PostProcessor
 from .metrics import compute_metrics
+from .render import render_png, save_png
+from .utils import ensure_dir
+
+# LOD name and the fraction of the base mesh's faces it keeps
+LOD_LEVELS = [
+    ("lod1", 1 / 2),  # Medium detail (50% reduction)
+    ("lod2", 1 / 4),  # Low detail (75% reduction)
+]
 
+# main.glb bytes of undeformed primitives, keyed by (template key, quantize)
+_MAIN_GLB_TEMPLATES: Dict[Tuple[Tuple[str, int], bool], bytes] = {}
+_MAX_GLB_TEMPLATES = 64
 
 class AssetGenerator:
     """Main class for generating 3D assets."""
@@ -22,7 +39,8 @@ class AssetGenerator:
     def __init__(self, output_dir: str = "outputs"):
         self.output_dir = output_dir
         self.postprocessor = PostProcessor()
-        os.makedirs(output_dir, exist_ok=True)
+        self._model = load_shared_model()
+        ensure_dir(output_dir)
     
     def generate_asset(
         self,
@@ -30,7 +48,8 @@ class AssetGenerator:
         seed: int = 42,
         steps: int = 20,
         guidance_scale: float = 7.5,
-        job_id: str = None
+        job_id: str = None,
+        quantize: bool = False
     ) -> Dict[str, Any]:
         """
         Generate a complete 3D asset with metadata and screenshots.
@@ -41,6 +60,7 @@ class AssetGenerator:
             steps: Number of generation steps
             guidance_scale: Guidance strength
             job_id: Optional job ID for tracking
+            quantize: Write main.glb with int16 KHR_mesh_quantization positions
         
         Returns:
             Dictionary with generation results and metadata
@@ -48,26 +68,45 @@ class AssetGenerator:
         if job_id is None:
             job_id = str(uuid.uuid4())
         
-        # Load model and generate base mesh
-        model = load_model(seed=seed)
-        base_mesh = model.generate_mesh(prompt, steps, guidance_scale)
+        # Generate base mesh from the shared model with this job's own Generator,
+        # so concurrent jobs don't share random state
+        base_mesh = self._model.generate_mesh(
+            prompt, steps, guidance_scale, rng=np.random.default_rng(seed)
+        )
+        
+        # Weld coincident vertices once so export, LODs and metrics all see the smaller mesh
+        base_mesh.merge_vertices(merge_tex=True, merge_norm=True)
         
         # Create output directory for this job
         job_dir = os.path.join(self.output_dir, job_id)
-        os.makedirs(job_dir, exist_ok=True)
+        try:
+            os.mkdir(job_dir)  # fresh job ids under an existing output dir need one mkdir
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(job_dir, exist_ok=True)
         
-        # Generate main asset
         main_path = os.path.join(job_dir, "main.glb")
-        base_mesh.export(main_path)
         
-        # Generate LODs
-        lod_paths = self._generate_lods(base_mesh, job_dir)
-        
-        # Generate screenshot
-        screenshot_path = self._generate_screenshot(base_mesh, job_dir)
-        
-        # Compute metrics
-        metrics = compute_metrics(base_mesh, main_path)
+        # Export, LODs and screenshot are independent and mostly GIL-free numpy/IO,
+        # so overlap them; metrics need main.glb on disk for the file size.
+        # trimesh's lazy property cache isn't thread-safe, so every task gets
+        # its own copy and base_mesh stays with this thread for the metrics
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            main_future = executor.submit(
+                self._export_main, base_mesh.copy(), main_path, quantize,
+                self._model.template_key(prompt, steps, guidance_scale)
+            )
+            lod_futures = [
+                executor.submit(self._generate_lod, base_mesh.copy(), job_dir, name, fraction, main_future)
+                for name, fraction in LOD_LEVELS
+            ]
+            screenshot_future = executor.submit(self._generate_screenshot, base_mesh.copy(), job_dir)
+            
+            main_future.result()
+            metrics = compute_metrics(base_mesh, main_path)
+            lod_paths = [future.result() for future in lod_futures]
+            screenshot_path = screenshot_future.result()
         
         # Create metadata
         metadata = {
@@ -89,50 +128,60 @@ class AssetGenerator:
         
         # Save metadata
         metadata_path = os.path.join(job_dir, "metadata.json")
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        if orjson is not None:
+            with open(metadata_path, 'wb') as f:
+                f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(metadata_path, 'w') as f:
+                json.dump(metadata, f, indent=2)
         
         return metadata
     
-    def _generate_lods(self, mesh: trimesh.Trimesh, job_dir: str) -> List[str]:
-        """Generate LOD versions of the mesh."""
-        lod_paths = []
+    def _export_main(self, mesh: trimesh.Trimesh, main_path: str, quantize: bool = False,
+                     template_key: Optional[Tuple[str, int]] = None) -> None:
+        """
+        Write main.glb, as a KHR_mesh_quantization GLB (geometry and normals only) when quantize is set.
+        
+        Meshes with a template_key are undeformed primitives that always export
+        to the same bytes, so the first export is kept and reused.
+        """
+        key = None if template_key is None else (template_key, quantize)
+        glb = _MAIN_GLB_TEMPLATES.get(key)
+        if glb is None:
+            if quantize:
+                glb = self.postprocessor.export_quantized_glb(mesh)
+            else:
+                glb = mesh.export(file_type='glb')
+            if key is not None and len(_MAIN_GLB_TEMPLATES) < _MAX_GLB_TEMPLATES:
+                _MAIN_GLB_TEMPLATES[key] = glb
         
-        # LOD 1: Medium detail (50% reduction)
-        lod1_mesh = self.postprocessor.decimate_mesh(mesh, target_faces=len(mesh.faces) // 2)
-        lod1_path = os.path.join(job_dir, "lod1.glb")
-        lod1_mesh.export(lod1_path)
-        lod_paths.append("lod1.glb")
+        with open(main_path, 'wb') as f:
+            f.write(glb)
+    
+    def _generate_lod(self, mesh: trimesh.Trimesh, job_dir: str, name: str, fraction: float,
+                      main_future: Future = None) -> str:
+        """Write <name>.glb keeping a fraction of the faces, via gltfpack from main.glb when available."""
+        lod_file = f"{name}.glb"
+        lod_path = os.path.join(job_dir, lod_file)
         
-        # LOD 2: Low detail (25% reduction)
-        lod2_mesh = self.postprocessor.decimate_mesh(mesh, target_faces=len(mesh.faces) // 4)
-        lod2_path = os.path.join(job_dir, "lod2.glb")
-        lod2_mesh.export(lod2_path)
-        lod_paths.append("lod2.glb")
+        if main_future is not None and self.postprocessor.gltfpack:
+            main_future.result()
+            if self.postprocessor.simplify_glb(os.path.join(job_dir, "main.glb"), lod_path, fraction):
+                return lod_file
         
-        return lod_paths
+        lod_mesh = self.postprocessor.decimate_mesh(mesh, target_faces=int(len(mesh.faces) * fraction))
+        lod_mesh.export(lod_path)
+        return lod_file
     
     def _generate_screenshot(self, mesh: trimesh.Trimesh, job_dir: str) -> str:
         """Generate a screenshot of the mesh."""
         try:
-            # Create a simple orthographic view
-            scene = mesh.scene()
-            
-            # Set up camera
-            camera_transform = np.eye(4)
-            camera_transform[:3, 3] = [2, 2, 2]  # Position camera
-            scene.camera_transform = camera_transform
-            
-            # Render scene (simplified - just save mesh as image representation)
             screenshot_path = os.path.join(job_dir, "screenshot.png")
             
-            # Create a simple visualization
-            # For now, create a placeholder image
-            img = Image.new('RGB', (512, 512), color='lightblue')
-            
-            # Add some basic info as text (simplified)
-            # In a real implementation, you'd use proper 3D rendering
-            img.save(screenshot_path)
+            # Render with the shared offscreen renderer; without pyrender/GL
+            # fall back to a placeholder image
+            if not render_png(mesh, screenshot_path):
+                save_png(Image.new('RGB', (512, 512), color='lightblue'), screenshot_path)
             
             return "screenshot.png"
             
@@ -146,7 +195,9 @@ def generate_asset_sync(
     seed: int = 42,
     steps: int = 20,
     guidance_scale: float = 7.5,
-    output_dir: str = "outputs"
+    output_dir: str = "outputs",
+    quantize: bool = False,
+    job_id: str = None
 ) -> Dict[str, Any]:
     """
     Synchronous asset generation function.
@@ -157,9 +208,13 @@ def generate_asset_sync(
         steps: Number of generation steps
         guidance_scale: Guidance strength
         output_dir: Output directory
+        quantize: Write main.glb with quantized vertex attributes
+        job_id: Optional job ID, used as the output subdirectory name
     
     Returns:
         Dictionary with generation results
     """
     generator = AssetGenerator(output_dir)
-    return generator.generate_asset(prompt, seed, steps, guidance_scale)
+    return generator.generate_asset(
+        prompt, seed, steps, guidance_scale, job_id=job_id, quantize=quantize
+    )
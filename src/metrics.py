@@ -2,10 +2,85 @@
 Metrics computation for 3D mesh validation and analysis.
 """
 
+import io
 import os
 import trimesh
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+
+# Triangles gathered per block; a (8192, 3, 3) float64 tile is ~576 KB and stays cache-resident
+_TRIANGLE_BLOCK = 8192
+
+
+def _triangle_statistics(vertices: np.ndarray, faces: np.ndarray) -> Dict[str, Any]:
+    """
+    Accumulate area and aspect-ratio statistics over cache-sized blocks of triangles.
+    
+    Each block's corners are gathered once and reused for every per-triangle
+    metric, instead of gathering vertices[faces] for the whole mesh.
+    
+    Args:
+        vertices: (N, 3) vertex positions
+        faces: (F, 3) triangle indices
+    
+    Returns:
+        Dictionary with surface_area, triangle_quality and aspect_ratio
+    """
+    count = 0
+    area_sum = 0.0
+    area_mean = 0.0
+    area_m2 = 0.0
+    area_min, area_max = np.inf, -np.inf
+    aspect_sum = 0.0
+    aspect_min, aspect_max = np.inf, -np.inf
+    
+    for start in range(0, len(faces), _TRIANGLE_BLOCK):
+        triangles = vertices[faces[start:start + _TRIANGLE_BLOCK]]
+        
+        areas = 0.5 * np.linalg.norm(
+            np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1
+        )
+        
+        # Compare squared edge lengths and take a single sqrt of the ratio
+        edge_vectors = triangles - triangles[:, [1, 2, 0]]
+        edges_sq = np.einsum('ijk,ijk->ij', edge_vectors, edge_vectors)
+        aspect = np.sqrt(edges_sq.max(axis=1) / np.maximum(edges_sq.min(axis=1), 1e-40))
+        
+        # Merge this block's area mean/variance into the running totals (Chan et al.)
+        block_count = len(areas)
+        block_mean = float(areas.mean())
+        block_m2 = float(np.square(areas - block_mean).sum())
+        delta = block_mean - area_mean
+        total = count + block_count
+        area_mean += delta * block_count / total
+        area_m2 += block_m2 + delta * delta * count * block_count / total
+        count = total
+        
+        area_sum += float(areas.sum())
+        area_min = min(area_min, float(areas.min()))
+        area_max = max(area_max, float(areas.max()))
+        aspect_sum += float(aspect.sum())
+        aspect_min = min(aspect_min, float(aspect.min()))
+        aspect_max = max(aspect_max, float(aspect.max()))
+    
+    if count == 0:
+        return {'surface_area': 0.0, 'triangle_quality': None, 'aspect_ratio': None}
+    
+    return {
+        'surface_area': area_sum,
+        'triangle_quality': {
+            'min_area': area_min,
+            'max_area': area_max,
+            'mean_area': area_sum / count,
+            'std_area': float(np.sqrt(area_m2 / count))
+        },
+        'aspect_ratio': {
+            'min': aspect_min,
+            'max': aspect_max,
+            'mean': aspect_sum / count
+        }
+    }
 
 
 def compute_metrics(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> Dict[str, Any]:
@@ -21,10 +96,14 @@ def compute_metrics(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> D
     """
     metrics = {}
     
+    vertices = mesh.vertices
+    faces = mesh.faces
+    triangle_stats = _triangle_statistics(vertices, faces)
+    
     # Basic geometry metrics
-    metrics['vertex_count'] = len(mesh.vertices)
-    metrics['face_count'] = len(mesh.faces)
-    metrics['edge_count'] = len(mesh.edges)
+    metrics['vertex_count'] = len(vertices)
+    metrics['face_count'] = len(faces)
+    metrics['edge_count'] = 3 * len(faces)  # one per face side, as len(mesh.edges)
     
     # Volume and surface area
     try:
@@ -32,13 +111,13 @@ def compute_metrics(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> D
     except Exception:
         metrics['volume'] = 0.0
     
-    try:
-        metrics['surface_area'] = float(mesh.surface_area)
-    except Exception:
-        metrics['surface_area'] = 0.0
+    metrics['surface_area'] = triangle_stats['surface_area']
     
     # Bounding box
-    bbox = mesh.bounds
+    if len(vertices) > 0:
+        bbox = np.array([vertices.min(axis=0), vertices.max(axis=0)])
+    else:
+        bbox = np.zeros((2, 3))
     metrics['bounding_box'] = {
         'min': bbox[0].tolist(),
         'max': bbox[1].tolist(),
@@ -46,8 +125,7 @@ def compute_metrics(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> D
     }
     
     # Mesh quality metrics
-    metrics['is_watertight'] = mesh.is_watertight
-    metrics['is_winding_consistent'] = mesh.is_winding_consistent
+    metrics['is_watertight'], metrics['is_winding_consistent'] = edge_topology(faces, len(vertices))
     metrics['is_empty'] = mesh.is_empty
     
     # UV coordinates presence
@@ -68,46 +146,57 @@ def compute_metrics(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> D
         metrics['file_size_mb'] = 0.0
     
     # Loadability test
-    metrics['loadable'] = test_mesh_loadability(mesh)
+    metrics['loadable'] = test_mesh_loadability(mesh, file_path)
     
     # Triangle quality metrics
-    if len(mesh.faces) > 0:
-        face_areas = mesh.area_faces
-        metrics['triangle_quality'] = {
-            'min_area': float(np.min(face_areas)),
-            'max_area': float(np.max(face_areas)),
-            'mean_area': float(np.mean(face_areas)),
-            'std_area': float(np.std(face_areas))
-        }
+    if len(faces) > 0:
+        metrics['triangle_quality'] = triangle_stats['triangle_quality']
         
-        # Aspect ratio (simplified)
-        try:
-            aspect_ratios = []
-            for face in mesh.faces:
-                vertices = mesh.vertices[face]
-                edges = np.linalg.norm(np.diff(vertices, axis=0), axis=1)
-                if len(edges) >= 3:
-                    aspect_ratio = np.max(edges) / np.min(edges)
-                    aspect_ratios.append(aspect_ratio)
-            
-            if aspect_ratios:
-                metrics['aspect_ratio'] = {
-                    'min': float(np.min(aspect_ratios)),
-                    'max': float(np.max(aspect_ratios)),
-                    'mean': float(np.mean(aspect_ratios))
-                }
-        except Exception:
-            metrics['aspect_ratio'] = {'min': 1.0, 'max': 1.0, 'mean': 1.0}
+        # Aspect ratio (simplified): longest over shortest edge of each triangle
+        metrics['aspect_ratio'] = triangle_stats['aspect_ratio']
     
     return metrics
 
 
-def test_mesh_loadability(mesh: trimesh.Trimesh) -> bool:
+def edge_topology(faces: np.ndarray, vertex_count: int) -> Tuple[bool, bool]:
+    """
+    Compute watertightness and winding consistency from a single edge sort.
+    
+    Args:
+        faces: (F, 3) triangle indices
+        vertex_count: Number of vertices the faces index into
+    
+    Returns:
+        (is_watertight, is_winding_consistent), matching trimesh's definitions
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    if len(faces) == 0:
+        return False, False
+    
+    # Directed edges of every face side, keyed by their undirected vertex pair
+    edges = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    keys = edges.min(axis=1) * vertex_count + edges.max(axis=1)
+    order = np.argsort(keys, kind='stable')
+    _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    
+    is_watertight = bool(np.all(counts == 2))
+    
+    # Faces sharing an edge must traverse it in opposite directions
+    shared = starts[counts == 2]
+    first, second = edges[order[shared]], edges[order[shared + 1]]
+    is_winding_consistent = bool(np.all(first[:, 0] == second[:, 1]))
+    
+    return is_watertight, is_winding_consistent
+
+
+def test_mesh_loadability(mesh: trimesh.Trimesh, file_path: Optional[str] = None) -> bool:
     """
     Test if mesh can be loaded and processed without errors.
     
     Args:
         mesh: Input mesh
+        file_path: Optional path of the GLB already written for this mesh; when
+            present it is loaded directly instead of re-exporting the mesh
     
     Returns:
         True if mesh is loadable, False otherwise
@@ -122,14 +211,17 @@ def test_mesh_loadability(mesh: trimesh.Trimesh) -> bool:
         
         # Test basic operations
         _ = mesh.volume
-        _ = mesh.surface_area
+        _ = mesh.area
         _ = mesh.bounds
         
-        # Test export/import cycle
-        glb_data = mesh.export(file_type='glb')
-        test_mesh = trimesh.load(io.BytesIO(glb_data), file_type='glb')
+        # Test the load side of the export/import cycle, reusing the file on disk if there is one
+        if file_path and os.path.exists(file_path):
+            loaded = trimesh.load(file_path, process=False)
+        else:
+            glb_data = mesh.export(file_type='glb')
+            loaded = trimesh.load(io.BytesIO(glb_data), file_type='glb', process=False)
         
-        return True
+        return not loaded.is_empty
         
     except Exception:
         return False
@@ -3,10 +3,90 @@ Lightweight model loader that procedurally generates 3D primitives based on prom
 Simulates ML model behavior with parameter-based variation.
 """
 
+import functools
 import numpy as np
 import trimesh
-from typing import Dict, Any, Tuple
-import random
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _twist_kernel(vertices, center_x, center_y, z_min, z_range):
+        """Twist vertices in place about the vertical axis through (center_x, center_y)."""
+        for i in range(vertices.shape[0]):
+            angle = (vertices[i, 2] - z_min) / z_range * np.pi
+            cos_angle = np.cos(angle)
+            sin_angle = np.sin(angle)
+            x = vertices[i, 0] - center_x
+            y = vertices[i, 1] - center_y
+            vertices[i, 0] = x * cos_angle - y * sin_angle + center_x
+            vertices[i, 1] = x * sin_angle + y * cos_angle + center_y
+else:
+    _twist_kernel = None
+
+
+def _warm_kernels() -> None:
+    """Compile the Numba kernels up front so the first request doesn't pay for it."""
+    if _twist_kernel is not None:
+        _twist_kernel(np.zeros((1, 3)), 0.0, 0.0, 0.0, 1.0)
+
+
+# Base primitive builders, one per shape keyword group
+_PRIMITIVE_BUILDERS = {
+    'cube': lambda: trimesh.creation.box(extents=[1, 1, 1]),
+    'sphere': lambda: trimesh.creation.icosphere(subdivisions=2),
+    'cylinder': lambda: trimesh.creation.cylinder(radius=0.5, height=1.0),
+    'cone': lambda: trimesh.creation.cone(radius=0.5, height=1.0),
+}
+
+
+@functools.lru_cache(maxsize=len(_PRIMITIVE_BUILDERS))
+def _base_primitive(kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Build a base primitive once per process and return read-only (vertices, faces)."""
+    mesh = _PRIMITIVE_BUILDERS[kind]()
+    vertices = np.array(mesh.vertices)
+    faces = np.array(mesh.faces)
+    vertices.flags.writeable = False
+    faces.flags.writeable = False
+    return vertices, faces
+
+
+def _spike_count(n_vertices: int) -> int:
+    """Number of spikes _add_spikes adds to a mesh with n_vertices vertices."""
+    return min(10, n_vertices // 4)
+
+
+# Prompt keywords that deform the base primitive in _apply_modifications
+_DEFORMATION_KEYWORDS = ('spiky', 'sharp', 'smooth', 'soft', 'twisted', 'spiral')
+
+
+def _base_shape(prompt_lower: str) -> str:
+    """Pick the base primitive for a lowercased prompt."""
+    if any(word in prompt_lower for word in ['cube', 'box', 'square']):
+        return 'cube'
+    elif any(word in prompt_lower for word in ['sphere', 'ball', 'round']):
+        return 'sphere'
+    elif any(word in prompt_lower for word in ['cylinder', 'tube', 'pipe']):
+        return 'cylinder'
+    elif any(word in prompt_lower for word in ['cone', 'pyramid']):
+        return 'cone'
+    return 'sphere'  # default
+
+
+@functools.lru_cache(maxsize=64)
+def _undeformed_primitive(kind: str, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return read-only (vertices, faces) of a base primitive scaled for steps, as generate_mesh would build it."""
+    vertices, faces = _base_primitive(kind)
+    mesh = trimesh.Trimesh(vertices=vertices.copy(), faces=faces.copy(), process=False)
+    mesh.apply_scale(1.0 + (steps - 10) * 0.1)
+    vertices = np.array(mesh.vertices)
+    vertices.flags.writeable = False
+    return vertices, faces
 
 
 class ProceduralModel:
@@ -14,10 +94,15 @@ class ProceduralModel:
     
     def __init__(self, seed: int = 42):
         self.seed = seed
-        random.seed(seed)
-        np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
     
-    def generate_mesh(self, prompt: str, steps: int = 20, guidance_scale: float = 7.5) -> trimesh.Trimesh:
+    def generate_mesh(
+        self,
+        prompt: str,
+        steps: int = 20,
+        guidance_scale: float = 7.5,
+        rng: Optional[np.random.Generator] = None
+    ) -> trimesh.Trimesh:
         """
         Generate a 3D mesh based on prompt keywords and parameters.
         
@@ -25,59 +110,83 @@ class ProceduralModel:
             prompt: Text description (keywords used to determine shape)
             steps: Number of generation steps (affects complexity)
             guidance_scale: Guidance strength (affects shape variation)
+            rng: Generator to draw variation from (defaults to the model's own);
+                pass one per job to generate concurrently from a shared model
         
         Returns:
             Generated trimesh mesh
         """
+        # Prompts that only scale the primitive give the same mesh every time
+        key = self.template_key(prompt, steps, guidance_scale)
+        if key is not None:
+            vertices, faces = _undeformed_primitive(*key)
+            return trimesh.Trimesh(vertices=vertices.copy(), faces=faces.copy(), process=False)
+        
         prompt_lower = prompt.lower()
+        base_shape = _base_shape(prompt_lower)
         
-        # Determine base shape from keywords
-        if any(word in prompt_lower for word in ['cube', 'box', 'square']):
-            base_shape = 'cube'
-        elif any(word in prompt_lower for word in ['sphere', 'ball', 'round']):
-            base_shape = 'sphere'
-        elif any(word in prompt_lower for word in ['cylinder', 'tube', 'pipe']):
-            base_shape = 'cylinder'
-        elif any(word in prompt_lower for word in ['cone', 'pyramid']):
-            base_shape = 'cone'
-        else:
-            base_shape = 'sphere'  # default
-        
-        # Generate base primitive
-        if base_shape == 'cube':
-            mesh = trimesh.creation.box(extents=[1, 1, 1])
-        elif base_shape == 'sphere':
-            mesh = trimesh.creation.icosphere(subdivisions=2)
-        elif base_shape == 'cylinder':
-            mesh = trimesh.creation.cylinder(radius=0.5, height=1.0)
-        elif base_shape == 'cone':
-            mesh = trimesh.creation.cone(radius=0.5, height=1.0)
+        # Copy the cached base primitive; it is already clean, so skip processing
+        vertices, faces = _base_primitive(base_shape)
+        mesh = trimesh.Trimesh(vertices=vertices.copy(), faces=faces.copy(), process=False)
         
         # Apply parameter-based modifications
-        mesh = self._apply_modifications(mesh, steps, guidance_scale, prompt_lower)
+        rng = self.rng if rng is None else rng
+        mesh = self._apply_modifications(mesh, steps, guidance_scale, prompt_lower, rng)
         
         return mesh
     
-    def _apply_modifications(self, mesh: trimesh.Trimesh, steps: int, guidance_scale: float, prompt: str) -> trimesh.Trimesh:
+    def template_key(self, prompt: str, steps: int = 20, guidance_scale: float = 7.5) -> Optional[Tuple[str, int]]:
+        """
+        Identify prompts whose mesh is an undeformed, scaled base primitive.
+        
+        Args:
+            prompt: Text description
+            steps: Number of generation steps
+            guidance_scale: Guidance strength
+        
+        Returns:
+            (base_shape, steps), which fully determines the generated mesh, or
+            None when noise or a keyword deformation applies
+        """
+        prompt_lower = prompt.lower()
+        if guidance_scale > 5.0 or any(word in prompt_lower for word in _DEFORMATION_KEYWORDS):
+            return None
+        return _base_shape(prompt_lower), steps
+    
+    def _apply_modifications(
+        self,
+        mesh: trimesh.Trimesh,
+        steps: int,
+        guidance_scale: float,
+        prompt: str,
+        rng: np.random.Generator
+    ) -> trimesh.Trimesh:
         """Apply modifications based on generation parameters."""
         
         # Scale based on steps (more steps = more complex)
         complexity_factor = 1.0 + (steps - 10) * 0.1
         mesh.apply_scale(complexity_factor)
         
+        # Draw every normal sample the job needs in one float32 call: vertex
+        # noise first, then spike offsets
+        add_noise = guidance_scale > 5.0
+        add_spikes = 'spiky' in prompt or 'sharp' in prompt
+        noise_count = mesh.vertices.size if add_noise else 0
+        spike_count = _spike_count(len(mesh.vertices)) * 9 if add_spikes else 0
+        samples = rng.standard_normal(noise_count + spike_count, dtype=np.float32)
+        
         # Apply noise based on guidance scale
-        if guidance_scale > 5.0:
+        if add_noise:
             # High guidance = more variation
             noise_scale = (guidance_scale - 5.0) * 0.1
-            vertices = mesh.vertices.copy()
-            noise = np.random.normal(0, noise_scale, vertices.shape)
-            vertices += noise
-            mesh.vertices = vertices
+            noise = samples[:noise_count].reshape(mesh.vertices.shape)
+            noise *= noise_scale
+            mesh.vertices += noise
         
         # Apply keyword-based modifications
-        if 'spiky' in prompt or 'sharp' in prompt:
+        if add_spikes:
             # Add spikes
-            mesh = self._add_spikes(mesh)
+            mesh = self._add_spikes(mesh, rng, samples[noise_count:])
         elif 'smooth' in prompt or 'soft' in prompt:
             # Smooth the mesh
             mesh = mesh.smoothed()
@@ -87,61 +196,73 @@ class ProceduralModel:
         
         return mesh
     
-    def _add_spikes(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
-        """Add spikes to the mesh."""
-        vertices = mesh.vertices.copy()
-        faces = mesh.faces.copy()
+    def _add_spikes(
+        self,
+        mesh: trimesh.Trimesh,
+        rng: np.random.Generator,
+        samples: Optional[np.ndarray] = None
+    ) -> trimesh.Trimesh:
+        """Add spikes to the mesh, jittered by pre-drawn standard normal samples when given."""
+        vertices = mesh.vertices
+        faces = mesh.faces
         
         # Add small spikes at random vertices
-        spike_indices = np.random.choice(len(vertices), size=min(10, len(vertices)//4), replace=False)
+        spike_indices = rng.choice(len(vertices), size=_spike_count(len(vertices)), replace=False)
         
-        for idx in spike_indices:
-            vertex = vertices[idx]
-            # Create a small spike
-            spike_vertices = []
-            spike_faces = []
-            
-            # Generate spike geometry
-            for i in range(3):
-                spike_vertex = vertex + np.random.normal(0, 0.1, 3)
-                spike_vertices.append(spike_vertex)
-            
-            # Add spike faces (simplified)
-            if len(spike_vertices) >= 3:
-                spike_faces.append([len(vertices), len(vertices)+1, len(vertices)+2])
-                vertices = np.vstack([vertices, spike_vertices])
-                faces = np.vstack([faces, np.array(spike_faces) + len(vertices) - 3])
+        # Each spike is one triangle of three jittered copies of its vertex
+        shape = (len(spike_indices), 3, 3)
+        if samples is None:
+            samples = rng.standard_normal(shape, dtype=np.float32)
+        offsets = samples.reshape(shape) * 0.1
+        spike_vertices = (vertices[spike_indices, None, :] + offsets).reshape(-1, 3)
+        spike_faces = np.arange(len(spike_vertices)).reshape(-1, 3) + len(vertices)
+        
+        vertices = np.concatenate([vertices, spike_vertices], axis=0)
+        faces = np.concatenate([faces, spike_faces], axis=0)
         
-        return trimesh.Trimesh(vertices=vertices, faces=faces)
+        return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
     
     def _apply_twist(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
         """Apply twist deformation to the mesh."""
-        vertices = mesh.vertices.copy()
+        if _twist_kernel is not None:
+            # Same twist as below, in one compiled pass over the vertices
+            vertices = np.array(mesh.vertices, dtype=np.float64)
+            z_min = vertices[:, 2].min()
+            z_range = vertices[:, 2].max() - z_min
+            if z_range > 0:
+                center = vertices.mean(axis=0)
+                _twist_kernel(vertices, center[0], center[1], z_min, z_range)
+            return trimesh.Trimesh(vertices=vertices, faces=mesh.faces, process=False)
         
-        # Apply twist around Z-axis
-        center = np.mean(vertices, axis=0)
-        vertices_centered = vertices - center
+        # Apply twist around Z-axis; the centered copy is the only new vertex
+        # buffer, rotated and shifted back in place
+        center = np.mean(mesh.vertices, axis=0)
+        vertices_centered = np.subtract(mesh.vertices, center)
         
         # Calculate twist angle based on height
         z_coords = vertices_centered[:, 2]
-        z_range = np.max(z_coords) - np.min(z_coords)
+        z_min = z_coords.min()
+        z_range = z_coords.max() - z_min
         if z_range > 0:
-            twist_angles = (z_coords - np.min(z_coords)) / z_range * np.pi
+            twist_angles = (z_coords - z_min) / z_range * np.pi
             
-            # Apply rotation
+            # Rotate each vertex's (x, y) by its angle, writing back in place
             cos_angles = np.cos(twist_angles)
             sin_angles = np.sin(twist_angles)
+            x = vertices_centered[:, 0].copy()
+            y = vertices_centered[:, 1]
             
-            x_new = vertices_centered[:, 0] * cos_angles - vertices_centered[:, 1] * sin_angles
-            y_new = vertices_centered[:, 0] * sin_angles + vertices_centered[:, 1] * cos_angles
-            
-            vertices_centered[:, 0] = x_new
-            vertices_centered[:, 1] = y_new
+            vertices_centered[:, 0] *= cos_angles
+            vertices_centered[:, 0] -= y * sin_angles
+            y *= cos_angles
+            y += x * sin_angles
         
-        vertices = vertices_centered + center
-        return trimesh.Trimesh(vertices=vertices, faces=mesh.faces)
+        vertices_centered += center
+        return trimesh.Trimesh(vertices=vertices_centered, faces=mesh.faces, process=False)
 
 
-def load_model(seed: int = 42) -> ProceduralModel:
-    """Load the procedural model."""
-    return ProceduralModel(seed=seed)
+@functools.lru_cache(maxsize=1)
+def load_shared_model() -> ProceduralModel:
+    """Load the procedural model once per process; pass each job its own rng to generate_mesh."""
+    _warm_kernels()
+    return ProceduralModel()
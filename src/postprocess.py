@@ -2,16 +2,123 @@
 Post-processing utilities for 3D mesh manipulation.
 """
 
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
 import trimesh
 import numpy as np
 from typing import Optional
 
+try:
+    import fast_simplification  # native (C++) quadric edge-collapse decimation
+except ImportError:
+    fast_simplification = None
+
+
+# glTF constants used by the quantized GLB writer
+_GLTF_BYTE = 5120
+_GLTF_SHORT = 5122
+_GLTF_UNSIGNED_SHORT = 5123
+_GLTF_UNSIGNED_INT = 5125
+_GLTF_FLOAT = 5126
+_GLTF_ARRAY_BUFFER = 34962
+_GLTF_ELEMENT_ARRAY_BUFFER = 34963
+
+# trimesh file types for the formats convert_format accepts
+_EXPORTERS = {'glb': 'glb', 'obj': 'obj', 'ply': 'ply'}
+
+
+
+def _pack_glb(faces, attributes, node=None, extensions=None) -> bytes:
+    """
+    Assemble a single-primitive GLB from faces and per-vertex attribute arrays.
+    
+    Args:
+        faces: (F, 3) triangle indices
+        attributes: (name, (N, C) array, componentType, normalized) tuples; the
+            first three columns are the VEC3 value, extra columns are padding
+        node: Optional extra node properties (e.g. translation/scale)
+        extensions: Optional glTF extensions the file requires
+    
+    Returns:
+        GLB file contents
+    """
+    faces = np.asarray(faces)
+    vertex_count = len(attributes[0][1])
+    if vertex_count < 65536:
+        indices, index_type = faces.astype(np.uint16).ravel(), _GLTF_UNSIGNED_SHORT
+    else:
+        indices, index_type = faces.astype(np.uint32).ravel(), _GLTF_UNSIGNED_INT
+    
+    blobs = [indices.tobytes()]
+    buffer_views = [{"buffer": 0, "byteLength": len(blobs[0]), "target": _GLTF_ELEMENT_ARRAY_BUFFER}]
+    accessors = [{"bufferView": 0, "componentType": index_type, "count": int(indices.size), "type": "SCALAR"}]
+    primitive_attributes = {}
+    
+    for name, data, component_type, normalized in attributes:
+        data = np.ascontiguousarray(data)
+        blobs.append(data.tobytes())
+        buffer_views.append({
+            "buffer": 0,
+            "byteLength": len(blobs[-1]),
+            "byteStride": data.strides[0],
+            "target": _GLTF_ARRAY_BUFFER
+        })
+        accessor = {
+            "bufferView": len(buffer_views) - 1,
+            "componentType": component_type,
+            "count": vertex_count,
+            "type": "VEC3"
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if name == "POSITION":
+            accessor["min"] = data[:, :3].min(axis=0).tolist()
+            accessor["max"] = data[:, :3].max(axis=0).tolist()
+        primitive_attributes[name] = len(accessors)
+        accessors.append(accessor)
+    
+    # Every buffer view starts on a 4-byte boundary
+    offset = 0
+    for view in buffer_views:
+        view["byteOffset"] = offset
+        offset += (view["byteLength"] + 3) & ~3
+    binary = b"".join(blob.ljust((len(blob) + 3) & ~3, b"\x00") for blob in blobs)
+    
+    header = {
+        "asset": {"version": "2.0", "generator": "game-ml PostProcessor"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [dict(node or {}, mesh=0)],
+        "meshes": [{"primitives": [{"attributes": primitive_attributes, "indices": 0, "mode": 4}]}],
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": len(binary)}]
+    }
+    if extensions:
+        header["extensionsUsed"] = list(extensions)
+        header["extensionsRequired"] = list(extensions)
+    
+    json_chunk = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    json_chunk = json_chunk.ljust((len(json_chunk) + 3) & ~3, b" ")
+    
+    total_length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return b"".join([
+        struct.pack("<4sII", b"glTF", 2, total_length),
+        struct.pack("<I4s", len(json_chunk), b"JSON"), json_chunk,
+        struct.pack("<I4s", len(binary), b"BIN\x00"), binary
+    ])
+
 
 class PostProcessor:
     """Post-processing utilities for 3D meshes."""
     
     def __init__(self):
-        pass
+        # meshoptimizer's gltfpack CLI, used for LODs when installed
+        self.gltfpack = shutil.which("gltfpack")
     
     def decimate_mesh(self, mesh: trimesh.Trimesh, target_faces: int) -> trimesh.Trimesh:
         """
@@ -27,21 +134,29 @@ class PostProcessor:
         if len(mesh.faces) <= target_faces:
             return mesh
         
-        try:
-            # Use trimesh's built-in decimation
-            decimated = mesh.simplify_quadric_decimation(face_count=target_faces)
-            return decimated
-        except Exception:
-            # Fallback: simple face reduction
-            return self._simple_decimation(mesh, target_faces)
+        if fast_simplification is None:
+            try:
+                # trimesh's own quadric decimation (open3d-backed on older trimesh)
+                return mesh.simplify_quadric_decimation(face_count=target_faces)
+            except ImportError:
+                # No quadric simplifier installed: simple face reduction
+                return self._simple_decimation(mesh, target_faces)
+        
+        # Call the QEM simplifier directly rather than through trimesh's wrapper,
+        # which imports it per call and reprocesses the result
+        vertices, faces = fast_simplification.simplify(
+            mesh.vertices, mesh.faces, target_reduction=1.0 - target_faces / len(mesh.faces)
+        )
+        return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
     
     def _simple_decimation(self, mesh: trimesh.Trimesh, target_faces: int) -> trimesh.Trimesh:
         """Simple decimation by removing faces."""
         if len(mesh.faces) <= target_faces:
             return mesh
         
-        # Randomly select faces to keep
-        keep_indices = np.random.choice(
+        # Randomly select faces to keep, from a private generator so LOD jobs on
+        # other threads never advance the global stream the model is seeded from
+        keep_indices = np.random.default_rng(0).choice(
             len(mesh.faces), 
             size=target_faces, 
             replace=False
@@ -49,8 +164,39 @@ class PostProcessor:
         
         new_faces = mesh.faces[keep_indices]
         
-        # Rebuild mesh with new faces
-        return trimesh.Trimesh(vertices=mesh.vertices, faces=new_faces)
+        # Rebuild mesh with new faces; the source vertices are already merged,
+        # so skip trimesh's processing pass and just drop unreferenced vertices
+        decimated = trimesh.Trimesh(vertices=mesh.vertices, faces=new_faces, process=False)
+        decimated.remove_unreferenced_vertices()
+        return decimated
+    
+    def simplify_glb(self, input_path: str, output_path: str, ratio: float) -> bool:
+        """
+        Simplify a GLB file with gltfpack (meshoptimizer).
+        
+        gltfpack decimates with meshoptimizer's quadric simplifier, reorders for
+        the vertex cache and quantizes attributes (KHR_mesh_quantization). It
+        doesn't apply EXT_meshopt_compression, which trimesh can't load.
+        
+        Args:
+            input_path: Source GLB
+            output_path: Destination GLB
+            ratio: Fraction of triangles to keep
+        
+        Returns:
+            True if gltfpack wrote the output, False if unavailable or it failed
+        """
+        if not self.gltfpack:
+            return False
+        
+        result = subprocess.run(
+            [self.gltfpack, "-i", input_path, "-o", output_path, "-si", str(ratio)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        if result.returncode != 0 or not os.path.exists(output_path):
+            print(f"Warning: gltfpack failed for {output_path}: {result.stderr.strip()}")
+            return False
+        return True
     
     def generate_lod(self, mesh: trimesh.Trimesh, lod_level: int) -> trimesh.Trimesh:
         """
@@ -68,25 +214,96 @@ class PostProcessor:
         
         return self.decimate_mesh(mesh, target_faces)
     
-    def convert_format(self, mesh: trimesh.Trimesh, format: str) -> bytes:
+    def convert_format(
+        self,
+        mesh: trimesh.Trimesh,
+        format: str,
+        out: Optional[io.BytesIO] = None
+    ):
         """
         Convert mesh to different format.
         
         Args:
             mesh: Input mesh
             format: Target format ('glb', 'obj', 'ply')
+            out: Optional buffer to export into; it is rewound and truncated,
+                so one buffer can be reused across exports once the previously
+                returned view has been released
         
         Returns:
-            Mesh data in target format
-        """
-        if format.lower() == 'glb':
-            return mesh.export(file_type='glb')
-        elif format.lower() == 'obj':
-            return mesh.export(file_type='obj')
-        elif format.lower() == 'ply':
-            return mesh.export(file_type='ply')
-        else:
+            Mesh data in target format, or a memoryview over ``out`` when given
+        """
+        file_type = _EXPORTERS.get(format.lower())
+        if file_type is None:
             raise ValueError(f"Unsupported format: {format}")
+        
+        if out is None:
+            return mesh.export(file_type=file_type)
+        
+        out.seek(0)
+        out.truncate()
+        mesh.export(file_obj=out, file_type=file_type)
+        return out.getbuffer()
+    
+    def export_compact_glb(self, mesh: trimesh.Trimesh, include_normals: bool = False) -> bytes:
+        """
+        Export mesh as GLB with float32 attributes and the narrowest index type.
+        
+        trimesh always writes uint32 indices; meshes under 65536 vertices use
+        uint16 here, halving the index buffer.
+        
+        Args:
+            mesh: Input mesh
+            include_normals: Also write float32 vertex normals
+        
+        Returns:
+            GLB file contents
+        """
+        attributes = [("POSITION", np.ascontiguousarray(mesh.vertices, dtype=np.float32), _GLTF_FLOAT, False)]
+        if include_normals:
+            attributes.append(
+                ("NORMAL", np.ascontiguousarray(mesh.vertex_normals, dtype=np.float32), _GLTF_FLOAT, False)
+            )
+        
+        return _pack_glb(mesh.faces, attributes)
+    
+    def export_quantized_glb(self, mesh: trimesh.Trimesh) -> bytes:
+        """
+        Export mesh as GLB with KHR_mesh_quantization vertex attributes.
+        
+        Positions are snapped to a signed int16 grid spanning the bounding box
+        (dequantized by the node translation/scale) and normals are stored as
+        normalized int8, shrinking vertex data from 24 to 12 bytes per vertex.
+        The node scale is uniform, as in gltfpack, so viewers transforming
+        normals by its inverse-transpose leave their direction unchanged.
+        
+        Args:
+            mesh: Input mesh
+        
+        Returns:
+            GLB file contents
+        """
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        
+        bounds_min = vertices.min(axis=0)
+        bounds_max = vertices.max(axis=0)
+        center = (bounds_min + bounds_max) / 2.0
+        scale = float((bounds_max - bounds_min).max()) / 2.0 / 32767.0
+        if scale == 0:
+            scale = 1.0
+        
+        # Vertex attributes must be 4-byte aligned, so pad VEC3 to 4 components
+        positions = np.zeros((len(vertices), 4), dtype=np.int16)
+        positions[:, :3] = np.round((vertices - center) / scale)
+        normals = np.zeros((len(vertices), 4), dtype=np.int8)
+        normals[:, :3] = np.round(np.asarray(mesh.vertex_normals) * 127.0)
+        
+        return _pack_glb(
+            mesh.faces,
+            [("POSITION", positions, _GLTF_SHORT, False), ("NORMAL", normals, _GLTF_BYTE, True)],
+            node={"translation": center.tolist(), "scale": [scale] * 3},
+            extensions=["KHR_mesh_quantization"]
+        )
     
     def optimize_mesh(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
         """
@@ -98,23 +315,21 @@ class PostProcessor:
         Returns:
             Optimized mesh
         """
-        # Remove duplicate vertices
-        mesh.remove_duplicate_vertices()
-        
-        # Remove unused vertices
-        mesh.remove_unused_vertices()
-        
-        # Merge vertices that are very close
+        # Merge duplicate and very close vertices; this also remaps the faces
         mesh.merge_vertices(merge_tex=True, merge_norm=True)
         
+        # Drop any vertices no face references
+        mesh.remove_unreferenced_vertices()
+        
         return mesh
     
-    def add_uv_coordinates(self, mesh: trimesh.Trimesh) -> trimesh.Trimesh:
+    def add_uv_coordinates(self, mesh: trimesh.Trimesh, copy: bool = True) -> trimesh.Trimesh:
         """
         Add UV coordinates to mesh if missing.
         
         Args:
             mesh: Input mesh
+            copy: Return a new mesh; pass False to set the UVs on ``mesh`` itself
         
         Returns:
             Mesh with UV coordinates
@@ -122,17 +337,13 @@ class PostProcessor:
         if hasattr(mesh.visual, 'uv') and mesh.visual.uv is not None:
             return mesh
         
-        # Generate simple UV coordinates
-        vertices = mesh.vertices
-        
-        # Simple planar projection
-        u = (vertices[:, 0] - vertices[:, 0].min()) / (vertices[:, 0].max() - vertices[:, 0].min())
-        v = (vertices[:, 1] - vertices[:, 1].min()) / (vertices[:, 1].max() - vertices[:, 1].min())
-        
-        uv = np.column_stack([u, v])
+        # Simple planar projection of x/y onto [0, 1]; flat axes map to 0
+        xy = mesh.vertices[:, :2]
+        xy_min = xy.min(axis=0)
+        xy_range = xy.max(axis=0) - xy_min
+        uv = ((xy - xy_min) / np.where(xy_range > 0, xy_range, 1.0)).astype(np.float32)
         
-        # Create new mesh with UV coordinates
-        new_mesh = mesh.copy()
+        new_mesh = mesh.copy() if copy else mesh
         new_mesh.visual.uv = uv
         
         return new_mesh
@@ -0,0 +1,86 @@
+"""
+Shared offscreen rendering for asset screenshots and snapshots.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import trimesh
+import numpy as np
+from PIL import Image
+
+
+# PNG encoder settings used for every screenshot the project writes
+PNG_SAVE_OPTIONS = {"format": "PNG", "optimize": True}
+
+
+def save_png(image: Image.Image, path) -> None:
+    """Write an image as PNG with the project-wide encoder settings."""
+    image.save(path, **PNG_SAVE_OPTIONS)
+
+
+class OffscreenRenderer:
+    """Process-wide pyrender offscreen renderer, so callers don't each create a GL context."""
+    
+    _instances: Dict[Tuple[int, int], "OffscreenRenderer"] = {}
+    _init_lock = threading.Lock()
+    
+    def __init__(self, resolution: Tuple[int, int] = (512, 512)):
+        # Headless machines have no display for pyglet, so render through EGL
+        if not os.environ.get("DISPLAY"):
+            os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+        import pyrender
+        
+        self._pyrender = pyrender
+        self._lock = threading.Lock()  # GL contexts are not thread-safe
+        self.renderer = pyrender.OffscreenRenderer(*resolution)
+        self.scene = pyrender.Scene(ambient_light=np.full(3, 0.3))
+        self.yfov = np.pi / 3.0
+        self.camera_node = self.scene.add(pyrender.PerspectiveCamera(yfov=self.yfov))
+        self.light_node = self.scene.add(pyrender.DirectionalLight(color=np.ones(3), intensity=3.0))
+    
+    @classmethod
+    def get(cls, resolution: Tuple[int, int] = (512, 512)) -> Optional["OffscreenRenderer"]:
+        """Return the shared renderer for a resolution, or None when pyrender/offscreen GL is unavailable."""
+        with cls._init_lock:
+            if resolution not in cls._instances:
+                try:
+                    cls._instances[resolution] = cls(resolution)
+                except Exception:
+                    cls._instances[resolution] = False
+        return cls._instances[resolution] or None
+    
+    def render(self, mesh: trimesh.Trimesh) -> np.ndarray:
+        """Render the mesh framed by its bounds into an RGB array."""
+        with self._lock:
+            node = self.scene.add(self._pyrender.Mesh.from_trimesh(mesh))
+            try:
+                radius = max(float(np.linalg.norm(mesh.extents)) / 2.0, 1e-6)
+                pose = np.eye(4)
+                pose[:3, 3] = mesh.bounds.mean(axis=0) + [0.0, 0.0, 1.2 * radius / np.tan(self.yfov / 2.0)]
+                self.scene.set_pose(self.camera_node, pose)
+                self.scene.set_pose(self.light_node, pose)
+                color, _ = self.renderer.render(self.scene)
+            finally:
+                self.scene.remove_node(node)
+        return color
+
+
+def render_png(mesh: trimesh.Trimesh, path, resolution: Tuple[int, int] = (512, 512)) -> bool:
+    """
+    Render a mesh with the shared offscreen renderer and save it as PNG.
+    
+    Args:
+        mesh: Mesh to render
+        path: Destination PNG path
+        resolution: (width, height) of the image
+    
+    Returns:
+        True if the PNG was written, False when offscreen rendering is unavailable
+    """
+    renderer = OffscreenRenderer.get(resolution)
+    if renderer is None:
+        return False
+    
+    save_png(Image.fromarray(renderer.render(mesh)), path)
+    return True
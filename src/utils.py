@@ -0,0 +1,14 @@
+"""
+Small filesystem helpers shared by the generator and scripts.
+"""
+
+import functools
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=64)
+def ensure_dir(path) -> Path:
+    """Create a directory (and parents) once per process and return it as a Path."""
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
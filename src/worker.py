@@ -3,9 +3,12 @@ Simple in-memory job queue for async generation tasks.
 """
 
 import asyncio
+import functools
+import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import time
 
@@ -32,6 +35,26 @@ class Job:
     completed_at: Optional[float] = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    # Set once the job has completed or failed
+    done_event: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+
+
+def _job_to_dict(job: Job) -> Dict[str, Any]:
+    """Build the status dictionary reported for a job."""
+    status_dict = {
+        "job_id": job.id,
+        "status": job.status.value,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
+    
+    if job.status == JobStatus.COMPLETED and job.result:
+        status_dict.update(job.result)
+    elif job.status == JobStatus.FAILED and job.error:
+        status_dict["error"] = job.error
+    
+    return status_dict
 
 
 class JobQueue:
@@ -40,6 +63,10 @@ class JobQueue:
     def __init__(self):
         self.jobs: Dict[str, Job] = {}
         self._running = False
+        self._num_workers = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # IDs of submitted jobs in arrival order; None tells the worker to stop
+        self._pending: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
     
     def submit_job(
         self,
@@ -72,6 +99,7 @@ class JobQueue:
         )
         
         self.jobs[job_id] = job
+        self._pending.put_nowait(job_id)
         return job_id
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -88,20 +116,7 @@ class JobQueue:
         if not job:
             return None
         
-        status_dict = {
-            "job_id": job.id,
-            "status": job.status.value,
-            "created_at": job.created_at,
-            "started_at": job.started_at,
-            "completed_at": job.completed_at
-        }
-        
-        if job.status == JobStatus.COMPLETED and job.result:
-            status_dict.update(job.result)
-        elif job.status == JobStatus.FAILED and job.error:
-            status_dict["error"] = job.error
-        
-        return status_dict
+        return _job_to_dict(job)
     
     async def process_job(self, job_id: str, output_dir: str = "outputs"):
         """
@@ -112,7 +127,7 @@ class JobQueue:
             output_dir: Output directory
         """
         job = self.jobs.get(job_id)
-        if not job:
+        if not job or job.status != JobStatus.PENDING:
             return
         
         try:
@@ -121,14 +136,18 @@ class JobQueue:
             
             # Run generation in thread pool to avoid blocking
             loop = asyncio.get_event_loop()
+            # Generate under the job's own ID so its files and status line up
             result = await loop.run_in_executor(
-                None,
-                generate_asset_sync,
-                job.prompt,
-                job.seed,
-                job.steps,
-                job.guidance_scale,
-                output_dir
+                self._executor,
+                functools.partial(
+                    generate_asset_sync,
+                    job.prompt,
+                    job.seed,
+                    job.steps,
+                    job.guidance_scale,
+                    output_dir,
+                    job_id=job.id
+                )
             )
             
             job.result = result
@@ -139,34 +158,78 @@ class JobQueue:
             job.status = JobStatus.FAILED
             job.error = str(e)
             job.completed_at = time.time()
+        
+        finally:
+            job.done_event.set()
     
-    async def start_worker(self, output_dir: str = "outputs"):
+    async def wait_for_job(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
-        Start the worker to process pending jobs.
+        Wait until a job has completed or failed.
+        
+        Args:
+            job_id: Job identifier
+            timeout: Seconds to wait before returning the current status anyway
+                (None waits until the job finishes)
+        
+        Returns:
+            Job status dictionary or None if not found
+        """
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        
+        try:
+            await asyncio.wait_for(job.done_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return _job_to_dict(job)
+    
+    async def _worker_loop(self, output_dir: str):
+        """Process queued jobs one at a time until the workers are stopped."""
+        while True:
+            # Sleep until a job is submitted (or the stop sentinel arrives)
+            job_id = await self._pending.get()
+            # Once stopped, finish only the job in hand; queued jobs stay pending
+            if job_id is None or not self._running:
+                break
+            await self.process_job(job_id, output_dir)
+    
+    async def start_worker(self, output_dir: str = "outputs", num_workers: Optional[int] = None):
+        """
+        Start the workers to process pending jobs.
         
         Args:
             output_dir: Output directory
+            num_workers: Number of jobs processed concurrently (defaults to the CPU count)
         """
+        cpu_count = os.cpu_count() or 1
+        self._num_workers = max(1, num_workers or cpu_count)
+        self._executor = ThreadPoolExecutor(max_workers=min(cpu_count, self._num_workers))
         self._running = True
         
-        while self._running:
-            # Find pending jobs
-            pending_jobs = [
-                job for job in self.jobs.values()
-                if job.status == JobStatus.PENDING
-            ]
-            
-            if pending_jobs:
-                # Process the first pending job
-                job = pending_jobs[0]
-                await self.process_job(job.id, output_dir)
-            else:
-                # Wait a bit before checking again
-                await asyncio.sleep(0.1)
+        # Queue every pending job in submission order; this keeps jobs left
+        # over from a previous run and drops its unused stop sentinels
+        self._pending = asyncio.Queue()
+        for job in sorted(self.jobs.values(), key=lambda job: job.created_at):
+            if job.status == JobStatus.PENDING:
+                self._pending.put_nowait(job.id)
+        
+        try:
+            await asyncio.gather(*(
+                self._worker_loop(output_dir) for _ in range(self._num_workers)
+            ))
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
     
     def stop_worker(self):
-        """Stop the worker."""
-        self._running = False
+        """Stop the workers."""
+        if self._running:
+            self._running = False
+            # One sentinel per worker wakes the idle ones; busy workers see
+            # _running on their next get and stop without draining the queue
+            for _ in range(self._num_workers):
+                self._pending.put_nowait(None)
     
     def list_jobs(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -175,10 +238,7 @@ class JobQueue:
         Returns:
             Dictionary of job statuses
         """
-        return {
-            job_id: self.get_job_status(job_id)
-            for job_id in self.jobs.keys()
-        }
+        return {job_id: _job_to_dict(job) for job_id, job in self.jobs.items()}
 
 
 # Global job queue instance
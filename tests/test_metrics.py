@@ -0,0 +1,97 @@
+"""
+Tests for mesh metrics, checked against trimesh's own properties.
+"""
+
+import pytest
+import numpy as np
+import trimesh
+
+from src.metrics import _TRIANGLE_BLOCK, _triangle_statistics, compute_metrics, edge_topology
+
+
+def _open_box():
+    """Box with one face removed: not watertight."""
+    box = trimesh.creation.box()
+    return trimesh.Trimesh(vertices=box.vertices, faces=box.faces[1:], process=False)
+
+
+def _flipped_sphere():
+    """Closed sphere with one face's winding reversed."""
+    sphere = trimesh.creation.icosphere(subdivisions=1)
+    faces = sphere.faces.copy()
+    faces[0] = faces[0, ::-1]
+    return trimesh.Trimesh(vertices=sphere.vertices, faces=faces, process=False)
+
+
+def _non_manifold_fan():
+    """Three triangles sharing one edge."""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1]], dtype=float)
+    faces = np.array([[0, 1, 2], [1, 0, 3], [0, 1, 4]])
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+
+@pytest.mark.parametrize("mesh", [
+    trimesh.creation.icosphere(subdivisions=2),
+    trimesh.creation.box(),
+    trimesh.creation.cylinder(radius=0.5, height=1.0),
+    _open_box(),
+    _flipped_sphere(),
+    _non_manifold_fan(),
+])
+def test_edge_topology_matches_trimesh(mesh):
+    """edge_topology agrees with trimesh's is_watertight and is_winding_consistent."""
+    is_watertight, is_winding_consistent = edge_topology(mesh.faces, len(mesh.vertices))
+    
+    assert is_watertight == mesh.is_watertight
+    assert is_winding_consistent == mesh.is_winding_consistent
+
+
+def test_triangle_statistics_match_numpy_across_blocks():
+    """Blocked statistics equal whole-array numpy results when faces span several blocks."""
+    mesh = trimesh.creation.icosphere(subdivisions=6)
+    mesh.vertices += np.random.default_rng(0).normal(0, 0.01, mesh.vertices.shape)
+    assert len(mesh.faces) > 2 * _TRIANGLE_BLOCK
+    
+    stats = _triangle_statistics(mesh.vertices, mesh.faces)
+    areas = mesh.area_faces
+    
+    assert stats['surface_area'] == pytest.approx(mesh.area, rel=1e-12)
+    quality = stats['triangle_quality']
+    assert quality['min_area'] == pytest.approx(areas.min(), rel=1e-12)
+    assert quality['max_area'] == pytest.approx(areas.max(), rel=1e-12)
+    assert quality['mean_area'] == pytest.approx(areas.mean(), rel=1e-12)
+    assert quality['std_area'] == pytest.approx(areas.std(), rel=1e-9)
+    
+    edge_lengths = np.linalg.norm(
+        mesh.triangles - mesh.triangles[:, [1, 2, 0]], axis=2
+    )
+    aspect = edge_lengths.max(axis=1) / edge_lengths.min(axis=1)
+    assert stats['aspect_ratio']['min'] == pytest.approx(aspect.min(), rel=1e-9)
+    assert stats['aspect_ratio']['max'] == pytest.approx(aspect.max(), rel=1e-9)
+    assert stats['aspect_ratio']['mean'] == pytest.approx(aspect.mean(), rel=1e-9)
+
+
+def test_triangle_statistics_std_of_uniform_areas():
+    """A regular grid's identical face areas give zero spread, not cancellation noise."""
+    mesh = trimesh.creation.box().subdivide().subdivide()
+    mesh.apply_translation([1e4, 1e4, 1e4])
+    
+    quality = _triangle_statistics(mesh.vertices, mesh.faces)['triangle_quality']
+    
+    assert quality['std_area'] == pytest.approx(0.0, abs=1e-12)
+
+
+def test_compute_metrics_matches_trimesh():
+    """Counts, area, bounds and topology in compute_metrics match trimesh."""
+    mesh = _flipped_sphere()
+    
+    metrics = compute_metrics(mesh)
+    
+    assert metrics['vertex_count'] == len(mesh.vertices)
+    assert metrics['face_count'] == len(mesh.faces)
+    assert metrics['edge_count'] == len(mesh.edges)
+    assert metrics['surface_area'] == pytest.approx(mesh.area)
+    assert metrics['bounding_box']['min'] == pytest.approx(mesh.bounds[0].tolist())
+    assert metrics['bounding_box']['max'] == pytest.approx(mesh.bounds[1].tolist())
+    assert metrics['is_watertight'] == mesh.is_watertight
+    assert metrics['is_winding_consistent'] == mesh.is_winding_consistent
@@ -0,0 +1,101 @@
+"""
+Tests for the procedural model's deformations.
+"""
+
+import pytest
+import numpy as np
+import trimesh
+
+import src.model_loader as model_loader
+from src.model_loader import ProceduralModel
+
+
+@pytest.mark.parametrize("prompt", ["spiky ball", "sharp cube", "spiky cone"])
+def test_spiky_prompts_generate_valid_meshes(prompt):
+    """Spike faces index into the mesh's vertices (the per-spike loop used to overrun them)."""
+    mesh = ProceduralModel(seed=7).generate_mesh(prompt)
+    
+    assert len(mesh.faces) > 0
+    assert mesh.faces.min() >= 0
+    assert mesh.faces.max() < len(mesh.vertices)
+
+
+def test_add_spikes_appends_one_triangle_per_spike():
+    """Each spike adds three vertices jittered around a source vertex and one face over them."""
+    base = trimesh.creation.icosphere(subdivisions=2)
+    
+    spiked = ProceduralModel(seed=3)._add_spikes(base, np.random.default_rng(3))
+    
+    spike_count = min(10, len(base.vertices) // 4)
+    assert len(spiked.faces) == len(base.faces) + spike_count
+    np.testing.assert_array_equal(spiked.faces[:len(base.faces)], base.faces)
+    spike_faces = spiked.faces[len(base.faces):]
+    assert np.all(spike_faces >= len(base.vertices))
+
+
+def test_same_seed_gives_same_mesh():
+    """Reseeding reproduces deformations exactly."""
+    first = ProceduralModel(seed=11).generate_mesh("spiky ball", guidance_scale=8.0)
+    second = ProceduralModel(seed=11).generate_mesh("spiky ball", guidance_scale=8.0)
+    
+    np.testing.assert_array_equal(first.vertices, second.vertices)
+    np.testing.assert_array_equal(first.faces, second.faces)
+
+
+@pytest.mark.skipif(model_loader._twist_kernel is None, reason="numba not installed")
+def test_twist_kernel_matches_numpy_path(monkeypatch):
+    """The compiled twist gives the same vertices as the numpy implementation."""
+    mesh = trimesh.creation.cylinder(radius=0.5, height=1.0, sections=32)
+    model = ProceduralModel(seed=1)
+    
+    compiled = model._apply_twist(mesh)
+    monkeypatch.setattr(model_loader, "_twist_kernel", None)
+    reference = model._apply_twist(mesh)
+    
+    np.testing.assert_allclose(compiled.vertices, reference.vertices, atol=1e-12)
+    np.testing.assert_array_equal(compiled.faces, reference.faces)
+
+
+def test_generation_leaves_global_random_state_alone():
+    """Models draw from their own Generator, so seeding one doesn't touch np.random."""
+    np.random.seed(0)
+    expected = np.random.random()
+    np.random.seed(0)
+    
+    ProceduralModel(seed=5).generate_mesh("spiky ball", guidance_scale=8.0)
+    
+    assert np.random.random() == expected
+
+
+def test_explicit_rng_matches_seeded_model():
+    """Passing a Generator seeded like the model reproduces the model's own output."""
+    shared = ProceduralModel(seed=0)
+    
+    first = shared.generate_mesh("spiky cube", guidance_scale=8.0, rng=np.random.default_rng(21))
+    second = ProceduralModel(seed=21).generate_mesh("spiky cube", guidance_scale=8.0)
+    
+    np.testing.assert_array_equal(first.vertices, second.vertices)
+
+
+@pytest.mark.parametrize("prompt", ["cube", "round ball", "pipe", "pyramid", "dragon"])
+def test_undeformed_prompts_match_full_generation(prompt, monkeypatch):
+    """The cached undeformed primitive equals what the deformation path builds."""
+    model = ProceduralModel(seed=2)
+    assert model.template_key(prompt, 15, 4.0) is not None
+    
+    cached = model.generate_mesh(prompt, steps=15, guidance_scale=4.0)
+    monkeypatch.setattr(ProceduralModel, "template_key", lambda *args: None)
+    built = model.generate_mesh(prompt, steps=15, guidance_scale=4.0)
+    
+    np.testing.assert_array_equal(cached.vertices, built.vertices)
+    np.testing.assert_array_equal(cached.faces, built.faces)
+    assert cached.vertices.flags.writeable
+
+
+def test_template_key_excludes_deformed_prompts():
+    """Noise or a deformation keyword means the mesh isn't a fixed template."""
+    model = ProceduralModel()
+    
+    assert model.template_key("cube", 20, 7.5) is None
+    assert model.template_key("twisted cube", 20, 3.0) is None
+    assert model.template_key("Cube", 20, 3.0) == ("cube", 20)
@@ -0,0 +1,219 @@
+"""
+Tests for the hand-written GLB exporters, loaded back through trimesh.
+"""
+
+import io
+import json
+import struct
+
+import pytest
+import numpy as np
+import trimesh
+
+from src.postprocess import PostProcessor
+
+
+def _gltf_header(glb: bytes) -> dict:
+    """Parse the JSON chunk of a GLB."""
+    magic, version, length = struct.unpack_from("<4sII", glb, 0)
+    assert magic == b"glTF" and version == 2 and length == len(glb)
+    chunk_length, chunk_type = struct.unpack_from("<I4s", glb, 12)
+    assert chunk_type == b"JSON"
+    return json.loads(glb[20:20 + chunk_length])
+
+
+def _load(glb: bytes) -> trimesh.Trimesh:
+    """Load GLB bytes back as a single unprocessed mesh."""
+    return trimesh.load(io.BytesIO(glb), file_type='glb', force='mesh', process=False)
+
+
+def _decoded_normals(glb: bytes) -> np.ndarray:
+    """Decode the stored NORMAL accessor and transform it by the node the way glTF viewers do."""
+    header = _gltf_header(glb)
+    json_length = struct.unpack_from("<I", glb, 12)[0]
+    binary = glb[20 + json_length + 8:]
+    
+    accessor = header["accessors"][header["meshes"][0]["primitives"][0]["attributes"]["NORMAL"]]
+    view = header["bufferViews"][accessor["bufferView"]]
+    assert accessor["componentType"] == 5120 and accessor["normalized"]  # normalized BYTE
+    raw = np.frombuffer(
+        binary, dtype=np.int8, count=accessor["count"] * view["byteStride"], offset=view["byteOffset"]
+    ).reshape(accessor["count"], view["byteStride"])[:, :3]
+    normals = np.maximum(raw / 127.0, -1.0)
+    
+    # Normals transform by the inverse-transpose of the node's scale
+    normals = normals / np.asarray(header["nodes"][0].get("scale", [1.0, 1.0, 1.0]))
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+def _index_component_type(header: dict) -> int:
+    """Return the glTF componentType of the primitive's index accessor."""
+    primitive = header["meshes"][0]["primitives"][0]
+    return header["accessors"][primitive["indices"]]["componentType"]
+
+
+def test_compact_glb_round_trips_through_trimesh():
+    """Compact GLB reloads with the same faces and float32-rounded positions."""
+    mesh = trimesh.creation.icosphere(subdivisions=3)
+    
+    glb = PostProcessor().export_compact_glb(mesh)
+    loaded = _load(glb)
+    
+    np.testing.assert_array_equal(loaded.faces, mesh.faces)
+    np.testing.assert_array_equal(loaded.vertices, mesh.vertices.astype(np.float32))
+    header = _gltf_header(glb)
+    assert _index_component_type(header) == 5123  # UNSIGNED_SHORT
+    assert "NORMAL" not in header["meshes"][0]["primitives"][0]["attributes"]
+
+
+def test_compact_glb_writes_normals_when_asked():
+    """include_normals adds a float32 NORMAL attribute matching the mesh's vertex normals."""
+    mesh = trimesh.creation.icosphere(subdivisions=2)
+    
+    glb = PostProcessor().export_compact_glb(mesh, include_normals=True)
+    
+    assert "NORMAL" in _gltf_header(glb)["meshes"][0]["primitives"][0]["attributes"]
+    np.testing.assert_allclose(_load(glb).vertex_normals, mesh.vertex_normals, atol=1e-6)
+
+
+def test_compact_glb_uses_uint32_indices_for_large_meshes():
+    """Meshes with 65536+ vertices fall back to UNSIGNED_INT indices."""
+    mesh = trimesh.creation.icosphere(subdivisions=7)
+    assert len(mesh.vertices) >= 65536
+    
+    glb = PostProcessor().export_compact_glb(mesh)
+    
+    assert _index_component_type(_gltf_header(glb)) == 5125  # UNSIGNED_INT
+    np.testing.assert_array_equal(_load(glb).faces, mesh.faces)
+
+
+def test_quantized_glb_round_trips_within_grid_precision():
+    """Quantized positions decode (via the node transform) to within one int16 grid step."""
+    mesh = trimesh.creation.icosphere(subdivisions=3)
+    mesh.apply_scale([2.0, 1.0, 0.5])
+    mesh.apply_translation([10.0, -3.0, 1.0])
+    
+    glb = PostProcessor().export_quantized_glb(mesh)
+    loaded = _load(glb)
+    
+    header = _gltf_header(glb)
+    assert header["extensionsRequired"] == ["KHR_mesh_quantization"]
+    step = mesh.extents.max() / 2.0 / 32767.0
+    np.testing.assert_array_equal(loaded.faces, mesh.faces)
+    assert np.all(np.abs(loaded.vertices - mesh.vertices) <= step)
+    
+    # int8 normals keep direction to within about one degree
+    cosine = np.einsum('ij,ij->i', loaded.vertex_normals, mesh.vertex_normals)
+    assert cosine.min() > np.cos(np.radians(1.5))
+
+
+def test_quantized_glb_normals_survive_the_node_transform():
+    """Stored normals, transformed by the node per the glTF spec, match the mesh's normals."""
+    mesh = trimesh.creation.torus(major_radius=1.0, minor_radius=0.25)
+    assert np.ptp(mesh.extents) > 0  # non-cubic bounds
+    
+    glb = PostProcessor().export_quantized_glb(mesh)
+    
+    scale = _gltf_header(glb)["nodes"][0]["scale"]
+    assert scale[0] == scale[1] == scale[2]
+    cosine = np.einsum('ij,ij->i', _decoded_normals(glb), mesh.vertex_normals)
+    assert cosine.min() > np.cos(np.radians(1.5))
+
+
+def test_quantized_glb_handles_flat_meshes():
+    """A zero-extent axis doesn't divide by zero in the quantization scale."""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=float)
+    mesh = trimesh.Trimesh(vertices=vertices, faces=[[0, 1, 2]], process=False)
+    
+    loaded = _load(PostProcessor().export_quantized_glb(mesh))
+    
+    np.testing.assert_allclose(loaded.vertices, vertices, atol=1e-4)
+
+
+def test_convert_format_reuses_output_buffer():
+    """Exporting into a shared buffer gives the same bytes as a fresh export."""
+    processor = PostProcessor()
+    buffer = io.BytesIO()
+    
+    for mesh in (trimesh.creation.icosphere(subdivisions=3), trimesh.creation.box()):
+        view = processor.convert_format(mesh, 'glb', out=buffer)
+        assert bytes(view) == processor.convert_format(mesh, 'GLB')
+        view.release()
+    
+    with pytest.raises(ValueError):
+        processor.convert_format(trimesh.creation.box(), 'fbx')
+
+
+def test_add_uv_coordinates_handles_flat_axes():
+    """Planar UVs span [0, 1] per axis, a zero-extent axis maps to 0, and copy=False mutates in place."""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 1]], dtype=float)
+    mesh = trimesh.Trimesh(vertices=vertices, faces=[[0, 1, 2]], process=False)
+    
+    copied = PostProcessor().add_uv_coordinates(mesh)
+    np.testing.assert_array_equal(copied.visual.uv, [[0, 0], [0.5, 0], [1, 0]])
+    assert copied.visual.uv.dtype == np.float32
+    assert not hasattr(mesh.visual, 'uv')
+    
+    assert PostProcessor().add_uv_coordinates(mesh, copy=False) is mesh
+    np.testing.assert_array_equal(mesh.visual.uv, copied.visual.uv)
+
+
+def test_optimize_mesh_welds_soup_and_drops_unused_vertices():
+    """A triangle-soup box with a stray vertex optimizes back to the 8-vertex box."""
+    box = trimesh.creation.box()
+    soup = box.vertices[box.faces].reshape(-1, 3)
+    vertices = np.vstack([soup, [[5.0, 5.0, 5.0]]])
+    mesh = trimesh.Trimesh(vertices=vertices, faces=np.arange(len(soup)).reshape(-1, 3), process=False)
+    
+    optimized = PostProcessor().optimize_mesh(mesh)
+    
+    assert len(optimized.vertices) == len(box.vertices)
+    assert len(optimized.faces) == len(box.faces)
+    assert optimized.is_watertight
+
+
+def test_generated_quantized_main_glb_keeps_normal_directions(tmp_path):
+    """main.glb from a quantized generation stores normals that match its geometry after the node transform."""
+    from src.generate import generate_asset_sync
+    
+    result = generate_asset_sync("dragon", seed=3, guidance_scale=8.0, output_dir=str(tmp_path), quantize=True)
+    glb = (tmp_path / result["job_id"] / "main.glb").read_bytes()
+    
+    mesh = _load(glb)
+    assert np.ptp(mesh.extents) > 0  # non-cubic bounds
+    cosine = np.einsum('ij,ij->i', _decoded_normals(glb), mesh.vertex_normals)
+    assert cosine.min() > np.cos(np.radians(2.0))
+
+
+def test_decimate_mesh_falls_back_to_trimesh_quadric_decimation(monkeypatch):
+    """Without fast_simplification, trimesh's quadric decimation is tried before dropping faces."""
+    import src.postprocess as postprocess
+    
+    mesh = trimesh.creation.icosphere(subdivisions=3)
+    decimated = trimesh.creation.icosphere(subdivisions=1)
+    calls = []
+    
+    def fake_quadric(self, face_count=None):
+        calls.append(face_count)
+        return decimated
+    
+    monkeypatch.setattr(postprocess, "fast_simplification", None)
+    monkeypatch.setattr(trimesh.Trimesh, "simplify_quadric_decimation", fake_quadric)
+    
+    assert PostProcessor().decimate_mesh(mesh, target_faces=80) is decimated
+    assert calls == [80]
+
+
+def test_decimate_mesh_drops_faces_when_no_simplifier_is_installed(monkeypatch):
+    """A missing quadric backend falls through to the random face reduction."""
+    import src.postprocess as postprocess
+    
+    def missing_backend(self, face_count=None):
+        raise ImportError("no quadric backend")
+    
+    monkeypatch.setattr(postprocess, "fast_simplification", None)
+    monkeypatch.setattr(trimesh.Trimesh, "simplify_quadric_decimation", missing_backend)
+    
+    decimated = PostProcessor().decimate_mesh(trimesh.creation.icosphere(subdivisions=3), target_faces=80)
+    
+    assert len(decimated.faces) == 80
@@ -0,0 +1,69 @@
+"""
+Tests for the in-memory job queue.
+"""
+
+import asyncio
+
+import pytest
+
+from src.worker import JobQueue, JobStatus
+
+
+@pytest.mark.asyncio
+async def test_stop_worker_leaves_queued_jobs_pending(tmp_path, monkeypatch):
+    """Stopping finishes the job in progress without generating the rest of the backlog."""
+    queue = JobQueue()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    processed = []
+    
+    async def fake_process_job(job_id, output_dir="outputs"):
+        processed.append(job_id)
+        started.set()
+        await release.wait()
+        queue.jobs[job_id].status = JobStatus.COMPLETED
+    
+    monkeypatch.setattr(queue, "process_job", fake_process_job)
+    job_ids = [queue.submit_job(f"cube {i}") for i in range(5)]
+    
+    worker = asyncio.create_task(queue.start_worker(str(tmp_path), num_workers=1))
+    await started.wait()
+    queue.stop_worker()
+    release.set()
+    await asyncio.wait_for(worker, timeout=5)
+    
+    assert processed == job_ids[:1]
+    assert all(queue.jobs[job_id].status == JobStatus.PENDING for job_id in job_ids[1:])
+
+
+@pytest.mark.asyncio
+async def test_restarted_worker_picks_up_pending_jobs(tmp_path, monkeypatch):
+    """Jobs left pending by a stop are processed, in order, when the worker starts again."""
+    queue = JobQueue()
+    processed = []
+    
+    async def fake_process_job(job_id, output_dir="outputs"):
+        processed.append(job_id)
+        queue.jobs[job_id].status = JobStatus.COMPLETED
+        if len(processed) == len(job_ids):
+            queue.stop_worker()
+    
+    monkeypatch.setattr(queue, "process_job", fake_process_job)
+    job_ids = [queue.submit_job(f"cube {i}") for i in range(3)]
+    
+    await asyncio.wait_for(queue.start_worker(str(tmp_path), num_workers=2), timeout=5)
+    
+    assert processed == job_ids
+
+
+@pytest.mark.asyncio
+async def test_wait_for_job_returns_current_status_on_timeout():
+    """A wait that times out reports the job as it stands instead of hanging."""
+    queue = JobQueue()
+    job_id = queue.submit_job("cube")
+    
+    status = await asyncio.wait_for(queue.wait_for_job(job_id, timeout=0.01), timeout=5)
+    
+    assert status["job_id"] == job_id
+    assert status["status"] == "pending"
+    assert await queue.wait_for_job("missing", timeout=0.01) is None
@@ -7,18 +7,66 @@ Validates GLB/OBJ files and reports comprehensive metrics.
 import argparse
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import trimesh
 import numpy as np
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _stats_kernel(values):
+        """Return (min, max, mean, std, sum) of a 1-D array in one pass."""
+        n = values.shape[0]
+        # Variance from sums shifted by the first value, which avoids the
+        # cancellation of the raw sum-of-squares formula
+        shift = values[0]
+        lo = shift
+        hi = shift
+        total = 0.0
+        shifted = 0.0
+        shifted_sq = 0.0
+        for i in range(n):
+            v = values[i]
+            lo = min(lo, v)
+            hi = max(hi, v)
+            total += v
+            d = v - shift
+            shifted += d
+            shifted_sq += d * d
+        variance = max(shifted_sq / n - (shifted / n) ** 2, 0.0)
+        return lo, hi, total / n, np.sqrt(variance), total
+else:
+    _stats_kernel = None
+
+# Mesh formats that store every triangle's corners separately (no shared vertices)
+_TRIANGLE_SOUP_FORMATS = {'.stl'}
+
+def _summary_stats(values):
+    """Return (min, max, mean, std, sum) of a 1-D array."""
+    if _stats_kernel is not None:
+        return tuple(float(x) for x in _stats_kernel(np.ascontiguousarray(values, dtype=np.float64)))
+    total = float(values.sum())
+    return float(values.min()), float(values.max()), total / len(values), float(values.std()), total
+
 def validate_mesh(mesh_path):
     """Validate a single mesh file and return comprehensive metrics."""
     print(f"🔍 Validating: {mesh_path}")
     
     try:
-        # Load mesh
-        mesh = trimesh.load(str(mesh_path))
+        # Load mesh as stored; only triangle soup formats need their vertices
+        # merged before topology checks mean anything
+        mesh = trimesh.load(str(mesh_path), process=mesh_path.suffix.lower() in _TRIANGLE_SOUP_FORMATS)
         
         # Handle Scene objects (combine geometries)
         if isinstance(mesh, trimesh.Scene):
@@ -36,7 +84,7 @@ def validate_mesh(mesh_path):
             'file_size_mb': mesh_path.stat().st_size / (1024 * 1024),
             'vertices': len(mesh.vertices),
             'faces': len(mesh.faces),
-            'edges': len(mesh.edges),
+            'edges': 3 * len(mesh.faces),  # same as len(mesh.edges), without building the array
             'is_watertight': mesh.is_watertight,
             'is_empty': mesh.is_empty,
             'is_winding_consistent': mesh.is_winding_consistent,
@@ -52,39 +100,42 @@ def validate_mesh(mesh_path):
             'center': mesh.centroid.tolist()
         }
         
-        # Normals
+        # Normals (each lazy property is read once)
+        vertex_normals = getattr(mesh, 'vertex_normals', None)
+        face_normals = getattr(mesh, 'face_normals', None)
         metrics['normals'] = {
-            'has_vertex_normals': hasattr(mesh, 'vertex_normals') and mesh.vertex_normals is not None,
-            'has_face_normals': hasattr(mesh, 'face_normals') and mesh.face_normals is not None,
-            'vertex_normal_count': len(mesh.vertex_normals) if hasattr(mesh, 'vertex_normals') and mesh.vertex_normals is not None else 0,
-            'face_normal_count': len(mesh.face_normals) if hasattr(mesh, 'face_normals') and mesh.face_normals is not None else 0
+            'has_vertex_normals': vertex_normals is not None,
+            'has_face_normals': face_normals is not None,
+            'vertex_normal_count': 0 if vertex_normals is None else len(vertex_normals),
+            'face_normal_count': 0 if face_normals is None else len(face_normals)
         }
         
         # UV coordinates
+        uv = getattr(getattr(mesh, 'visual', None), 'uv', None)
         metrics['uv_coordinates'] = {
-            'has_uv': hasattr(mesh, 'visual') and hasattr(mesh.visual, 'uv'),
-            'uv_count': len(mesh.visual.uv) if hasattr(mesh, 'visual') and hasattr(mesh.visual, 'uv') else 0
+            'has_uv': uv is not None,
+            'uv_count': 0 if uv is None else len(uv)
         }
         
         # Triangle quality metrics
         if len(mesh.faces) > 0:
-            face_areas = mesh.area_faces
+            min_area, max_area, mean_area, std_area, total_area = _summary_stats(mesh.area_faces)
             metrics['triangle_quality'] = {
-                'min_area': float(np.min(face_areas)),
-                'max_area': float(np.max(face_areas)),
-                'mean_area': float(np.mean(face_areas)),
-                'std_area': float(np.std(face_areas)),
-                'total_area': float(np.sum(face_areas))
+                'min_area': min_area,
+                'max_area': max_area,
+                'mean_area': mean_area,
+                'std_area': std_area,
+                'total_area': total_area
             }
         
         # Edge length metrics
-        if len(mesh.edges) > 0:
-            edge_lengths = mesh.edges_unique_length
+        if len(mesh.faces) > 0:
+            min_length, max_length, mean_length, std_length, _ = _summary_stats(mesh.edges_unique_length)
             metrics['edge_quality'] = {
-                'min_length': float(np.min(edge_lengths)),
-                'max_length': float(np.max(edge_lengths)),
-                'mean_length': float(np.mean(edge_lengths)),
-                'std_length': float(np.std(edge_lengths))
+                'min_length': min_length,
+                'max_length': max_length,
+                'mean_length': mean_length,
+                'std_length': std_length
             }
         
         # Validation checks
@@ -134,11 +185,15 @@ def validate_directory(directory_path):
     
     print(f"📁 Found {len(mesh_files)} mesh files to validate")
     
-    all_metrics = []
-    for mesh_file in mesh_files:
-        metrics = validate_mesh(mesh_file)
-        all_metrics.append(metrics)
-        print()  # Add spacing between files
+    # Files are independent, so load and validate them in separate processes;
+    # map keeps the results in file order
+    workers = min(len(mesh_files), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            all_metrics = list(executor.map(validate_mesh, mesh_files))
+    else:
+        all_metrics = [validate_mesh(mesh_file) for mesh_file in mesh_files]
+    print()
     
     return all_metrics
 
@@ -206,8 +261,12 @@ def save_metrics(metrics_list, output_path="outputs/metrics.json"):
         'metrics': metrics_list
     }
     
-    with open(output_file, 'w') as f:
-        json.dump(report, f, indent=2)
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
     
     print(f"📄 Metrics saved to: {output_file}")
 